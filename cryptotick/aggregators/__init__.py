@@ -1,10 +1,11 @@
 from .adaptivethreshold import SMA, AdaptiveThresholdAggregator
-from .threshold import ThresholdAggregator
+from .threshold import MultiThresholdAggregator, ThresholdAggregator
 from .trades import TradeAggregator
 
 __all__ = [
     "SMA",
     "AdaptiveThresholdAggregator",
+    "MultiThresholdAggregator",
     "ThresholdAggregator",
     "TradeAggregator",
 ]
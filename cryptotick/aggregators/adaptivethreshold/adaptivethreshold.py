@@ -3,6 +3,7 @@ from ..threshold.lib import aggregate_threshold, parse_thresh_attr
 from .constants import SMA
 from .lib import (
     get_initial_adaptive_threshold_cache,
+    get_window,
     parse_target_frequency,
     parse_target_type,
     parse_window_size,
@@ -33,26 +34,28 @@ class AdaptiveThresholdAggregator(BaseThresholdAggregator):
         date_from=None,
         date_to=None,
         has_multiple_symbols=False,
+        backfill=0,
         verbose=False,
     ):
         super().__init__(
             source_table,
             destination_table,
-            symbol=None,
-            min_slippage=None,
-            max_slippage=None,
-            min_volume=None,
-            max_volume=None,
-            min_notional=None,
-            max_notional=None,
-            min_exponent=None,
-            max_exponent=None,
-            tick_rule=None,
-            top_n=10,
-            date_from=None,
-            date_to=None,
-            has_multiple_symbols=False,
-            verbose=False,
+            symbol=symbol,
+            min_slippage=min_slippage,
+            max_slippage=max_slippage,
+            min_volume=min_volume,
+            max_volume=max_volume,
+            min_notional=min_notional,
+            max_notional=max_notional,
+            min_exponent=min_exponent,
+            max_exponent=max_exponent,
+            tick_rule=tick_rule,
+            top_n=top_n,
+            date_from=date_from,
+            date_to=date_to,
+            has_multiple_symbols=has_multiple_symbols,
+            backfill=backfill,
+            verbose=verbose,
         )
 
         self.thresh_attr = parse_thresh_attr(thresh_attr)
@@ -66,7 +69,8 @@ class AdaptiveThresholdAggregator(BaseThresholdAggregator):
 
     def aggregate(self, data_frame, cache):
         # Warmup
-        remaining = self.window_size - len(cache["window"])
+        window = get_window(cache, self.window_size, target_type=self.target_type)
+        remaining = self.window_size - window["count"]
         total = data_frame[self.thresh_attr].sum()
         if remaining > 0:
             data = []
@@ -76,7 +80,10 @@ class AdaptiveThresholdAggregator(BaseThresholdAggregator):
             )
         # Update window and target
         cache = update_adaptive_cache_window(
-            cache, total, self.window_size, target_frequency=self.target_frequency
+            cache,
+            total,
+            self.window_size,
+            target_type=self.target_type,
+            target_frequency=self.target_frequency,
         )
-        assert len(cache["window"]) <= self.window_size
         return data, cache
@@ -1,3 +1,5 @@
+import math
+
 import pandas as pd
 
 from .constants import EMA, SMA
@@ -22,24 +24,57 @@ def parse_target_type(target_type):
 
 
 def get_initial_adaptive_threshold_cache(thresh_attr):
-    return {thresh_attr: 0, "target": float("Inf"), "window": []}
-
-
-def get_adaptive_target_sma(window):
-    series = pd.Series(window)
-    return series.mean()
-
-
-def get_adaptive_target_ema(window, window_size):
-    series = pd.Series(window)
-    return series.ewm(span=window_size, adjust=False).mean()
+    return {thresh_attr: 0, "target": float("Inf"), "window": {"count": 0}}
+
+
+def get_window(cache, window_size, target_type=SMA):
+    """Window state, maybe from a previous cache, a list of values."""
+    window = cache["window"]
+    if isinstance(window, list):
+        state = {"count": 0}
+        for value in window:
+            state = update_window(state, value, window_size, target_type)
+        return state
+    return window
+
+
+def update_window(window, value, window_size, target_type=SMA):
+    """
+    Constant time. SMA is a ring buffer of values, with a running sum. EMA is
+    running, so has no buffer.
+    """
+    size = int(window_size)
+    count = window["count"]
+    if target_type == SMA:
+        values = window.setdefault("values", [])
+        if len(values) < size:
+            values.append(value)
+            window["sum"] = window.get("sum", 0) + value
+        else:
+            # Oldest value
+            index = count % size
+            window["sum"] += value - values[index]
+            values[index] = value
+            # Float error, once per cycle
+            if index == size - 1:
+                window["sum"] = math.fsum(values)
+    elif target_type == EMA:
+        alpha = 2 / (window_size + 1)
+        if count:
+            window["ema"] = alpha * value + (1 - alpha) * window["ema"]
+        else:
+            window["ema"] = value
+    else:
+        raise NotImplementedError
+    window["count"] = count + 1
+    return window
 
 
-def get_adaptive_target(window, window_size, target_type):
+def get_adaptive_target(window, target_type=SMA):
     if target_type == SMA:
-        return get_adaptive_target_sma(window)
+        return window["sum"] / len(window["values"])
     elif target_type == EMA:
-        return get_adaptive_target_ema(window, window_size)
+        return window["ema"]
     else:
         raise NotImplementedError
 
@@ -55,10 +90,9 @@ def update_adaptive_cache_window(
     cache, value, window_size, target_type=SMA, target_frequency="1h"
 ):
     val = float(value)  # Firestore doesn't like 64bit types
-    cache["window"].append(val)
-    if len(cache["window"]) > window_size:
-        cache["window"].pop(0)
-        target = get_adaptive_target(cache["window"], window_size)
+    window = get_window(cache, window_size, target_type=target_type)
+    cache["window"] = update_window(window, val, window_size, target_type)
+    if window["count"] > window_size:
+        target = get_adaptive_target(window, target_type=target_type)
         cache["target"] = get_adaptive_target_for_frequency(target, target_frequency)
-        assert len(cache["window"]) == window_size
     return cache
@@ -1,3 +1,5 @@
+from copy import deepcopy
+
 from google.cloud import bigquery
 
 from ..bqloader import BigQueryLoader, get_schema_columns, get_table_id
@@ -20,6 +22,8 @@ class BaseAggregator(CryptoExchangeETL):
         self.require_cache = require_cache
         self.has_multiple_symbols = has_multiple_symbols
         self.verbose = verbose
+        # Cache by date, if not yet written to Firebase.
+        self.caches = {}
 
         min_date = self.get_min_date()
         self.initialize_dates(min_date, date_from, date_to)
@@ -76,8 +80,11 @@ class BaseAggregator(CryptoExchangeETL):
                         return candle["open"]["timestamp"].date()
 
     def get_cache(self, data_frame):
-        document = get_delta(self.date, days=-1).isoformat()
-        data = self.firestore_destination.get(document)
+        date = get_delta(self.date, days=-1)
+        if date in self.caches:
+            data = deepcopy(self.caches[date])
+        else:
+            data = self.firestore_destination.get(date.isoformat())
         # Is cache required, and no data?
         if self.require_cache and not data:
             # Is date greater than min date?
@@ -1,6 +1,9 @@
 import numpy as np
 
-from ..lib import aggregate_rows, get_next_cache, merge_cache
+from ...lib import aggregate_bars, get_next_cache, merge_cache
+
+# Rows scanned for the next brick, before scanning further.
+PADDING = 64
 
 
 def get_level(price, box_size):
@@ -29,7 +32,7 @@ def update_cache(data_frame, cache, sample):
     # Cache
     cache["timestamp"] = sample["timestamp"]
     cache["level"] = sample["level"]
-    cache["direction"] = np.sign(sample["change"])
+    cache["direction"] = int(np.sign(sample["change"]))
     return cache
 
 
@@ -66,52 +69,60 @@ def get_change(cache, high, low, price, box_size, level_func=get_level):
     return level, 0
 
 
-def aggregate_renko(data_frame, cache, box_size, top_n=10, level_func=get_level):
+def get_renko_stops(price, cache, box_size, reversal=1, level_func=get_level):
+    """
+    Last row of each brick, with its level and change. Prices are compared
+    with the bounds of the current level, in windows, so only rows up to each
+    brick are scanned. Each brick may be more than one box.
+    """
+    p = price if level_func == get_level else np.log1p(price)
+    state = {"level": cache["level"], "direction": cache["direction"]}
+    stops, levels, changes = [], [], []
     start = 0
-    samples = []
-    high, low = get_bounds(cache, box_size)
-    for index, row in data_frame.iterrows():
-        level, change = get_change(
-            cache, high, low, row.price, box_size, level_func=level_func
-        )
-        if change:
-            sample = aggregate_rows(
-                data_frame,
-                level,
-                start,
-                stop=index,
-                top_n=top_n,
-                extra={"level": level},
+    size = PADDING
+    while start < len(p):
+        high, low = get_bounds(state, box_size, reversal=reversal)
+        window = p[start : start + size]
+        is_change = (window >= high) | (window < low)
+        if is_change.any():
+            index = start + int(np.argmax(is_change))
+            level, change = get_change(
+                state, high, low, price[index], box_size, level_func=level_func
             )
-            if "nextDay" in cache:
-                # Next day is today's previous
-                previous_day = cache.pop("nextDay")
-                sample = merge_cache(previous_day, sample, top_n=top_n)
-            # Positive or negative change
-            sample["change"] = change
-            # Is new level higher or lower than previous?
-            assert_higher_or_lower(level, cache)
-            # Is price bounded by the next higher or lower level?
-            assert_bounds(row, cache, box_size)
-            # Next index
+            stops.append(index)
+            levels.append(level)
+            changes.append(change)
+            state = {"level": level, "direction": int(np.sign(change))}
             start = index + 1
-            # Update cache
-            cache = update_cache(data_frame, cache, sample)
-            high, low = get_bounds(cache, box_size)
-            samples.append(sample)
+            size = PADDING
+        else:
+            start += size
+            size *= 2
+    return stops, levels, changes
+
+
+def aggregate_renko(
+    data_frame, cache, box_size, top_n=10, reversal=1, level_func=get_level
+):
+    price = data_frame.price.to_numpy()
+    stops, levels, changes = get_renko_stops(
+        price, cache, box_size, reversal=reversal, level_func=level_func
+    )
+    samples = aggregate_bars(data_frame, stops, top_n=top_n)
+    for index, sample in enumerate(samples):
+        sample["level"] = levels[index]
+        if "nextDay" in cache:
+            # Next day is today's previous
+            previous_day = cache.pop("nextDay")
+            sample = merge_cache(previous_day, sample, top_n=top_n)
+        # Positive or negative change
+        sample["change"] = changes[index]
+        samples[index] = sample
+        # Update cache
+        cache = update_cache(data_frame, cache, sample)
     # Cache
+    start = stops[-1] + 1 if stops else 0
     is_last_row = start == len(data_frame)
     if not is_last_row:
         cache = get_next_cache(data_frame, cache, start, top_n=top_n)
     return samples, cache
-
-
-def assert_higher_or_lower(level, cache):
-    assert level < cache["level"] or level > cache["level"]
-
-
-def assert_bounds(row, cache, box_size):
-    high, low = get_bounds(cache, box_size)
-    assert low <= cache["level"] <= high
-    # Maybe float
-    assert np.isclose(high, low + (box_size * 2))
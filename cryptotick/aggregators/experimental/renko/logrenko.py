@@ -1,6 +1,7 @@
-from ...bqloader import stringify_datetime_types
-from ...fscache import firestore_data
-from .lib import aggregate_renko, get_initial_cache, get_log_level, get_value_display
+from ....bqloader import stringify_datetime_types
+from ....fscache import firestore_data
+from ...lib import get_value_display
+from .lib import aggregate_renko, get_initial_cache, get_log_level
 from .renko import Renko
 
 
@@ -16,7 +17,12 @@ class LogRenko(Renko):
     def process_data_frame(self, data_frame):
         data_frame, cache = self.get_cache(data_frame)
         data, cache = aggregate_renko(
-            data_frame, cache, self.box_size, top_n=self.top_n, level_func=get_log_level
+            data_frame,
+            cache,
+            self.box_size,
+            top_n=self.top_n,
+            reversal=self.reversal,
+            level_func=get_log_level,
         )
         # Index
         for index, d in enumerate(data):
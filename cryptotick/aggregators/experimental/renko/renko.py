@@ -1,13 +1,14 @@
-from ...bqloader import (
+from ....bqloader import (
     MULTIPLE_SYMBOL_RENKO_SCHEMA,
     SINGLE_SYMBOL_RENKO_SCHEMA,
     BigQueryLoader,
     stringify_datetime_types,
 )
-from ...fscache import firestore_data
-from ...utils import date_range
-from ..base import BaseAggregator
-from .lib import aggregate_renko, get_initial_cache, get_value_display
+from ....fscache import firestore_data
+from ....utils import date_range
+from ...base import BaseAggregator
+from ...lib import get_value_display
+from .lib import aggregate_renko, get_initial_cache
 
 
 class Renko(BaseAggregator):
@@ -69,7 +70,13 @@ class Renko(BaseAggregator):
 
     def process_data_frame(self, data_frame):
         data_frame, cache = self.get_cache(data_frame)
-        data, cache = aggregate_renko(data_frame, cache, self.box_size, self.top_n)
+        data, cache = aggregate_renko(
+            data_frame,
+            cache,
+            self.box_size,
+            top_n=self.top_n,
+            reversal=self.reversal,
+        )
         # Index
         for index, d in enumerate(data):
             data[index] = stringify_datetime_types(firestore_data(d, strip_date=False))
@@ -1,5 +1,26 @@
 from operator import itemgetter
 
+import numpy as np
+
+from .topn import TOP_N_COLUMNS, TopN
+
+BAR_STATISTICS = (
+    "timestamp",
+    "nanoseconds",
+    "open",
+    "high",
+    "low",
+    "close",
+    "slippage",
+    "buySlippage",
+    "volume",
+    "buyVolume",
+    "notional",
+    "buyNotional",
+    "ticks",
+    "buyTicks",
+)
+
 
 def get_value_display(value):
     if value % 1 == 0:
@@ -8,63 +29,103 @@ def get_value_display(value):
         return str(value).replace(".", "d")
 
 
-def get_next_cache(data_frame, cache, start, extra={}):
-    next_day = aggregate_rows(data_frame, start, top_n=cache["maxTopN"], extra=extra)
+def get_next_cache(data_frame, cache, start, top_n=10, extra={}):
+    next_day = aggregate_rows(data_frame, start, top_n=top_n, extra=extra)
     if "nextDay" in cache:
         previous_day = cache.pop("nextDay")
-        cache["nextDay"] = merge_cache(previous_day, next_day, top_n=cache["maxTopN"])
-    else:
-        cache["nextDay"] = next_day
+        next_day = merge_cache(previous_day, next_day, top_n=top_n)
+    # Compact
+    next_day["topN"] = TopN(top_n, next_day["topN"]).to_cache()
+    cache["nextDay"] = next_day
     return cache
 
 
 def aggregate_rows(data_frame, start, stop=None, top_n=10, extra={}):
     df = data_frame.loc[start:stop]
-    first_row = df.iloc[0]
-    last_row = df.iloc[-1]
-    buy_side = df[df.tickRule == 1]
-    data = {
-        "date": last_row.timestamp.date(),
-        "timestamp": last_row.timestamp,
-        "nanoseconds": last_row.nanoseconds,
-        "open": first_row.price,
-        "high": df.price.max(),
-        "low": df.price.min(),
-        "close": last_row.price,
-        "slippage": df.slippage.sum(),
-        "buySlippage": buy_side.slippage.sum(),
-        "volume": df.volume.sum(),
-        "buyVolume": buy_side.volume.sum(),
-        "notional": df.notional.sum(),
-        "buyNotional": buy_side.notional.sum(),
-        "ticks": len(df),
-        "buyTicks": len(buy_side),
-        "topN": get_top_n(df, top_n=top_n),
-    }
+    data = aggregate_bars(df, [len(df) - 1], top_n=top_n)[0]
     data.update(extra)
     return data
 
 
-def get_top_n(data_frame, top_n=10):
-    if top_n:
-        top_n = data_frame.nlargest(top_n, "volume")
-        top = top_n.to_dict("records")
-        for record in top:
-            for key in list(record):
-                if key not in (
-                    "timestamp",
-                    "nanoseconds",
-                    "price",
-                    "slippage",
-                    "volume",
-                    "notional",
-                    "exponent",
-                    "tickRule",
-                ):
-                    del record[key]
-        top.sort(key=itemgetter("timestamp", "nanoseconds"))
-        return top
-    return []
+def aggregate_bars(data_frame, stops, start=0, top_n=10, extra={}):
+    """Bars, as aggregate_rows, from the statistics of all bars."""
+    stats = get_bar_statistics(data_frame, stops, start=start)
+    top = get_top_n_bars(data_frame, stats["start"], stats["stop"], top_n=top_n)
+    samples = []
+    for index, timestamp in enumerate(stats["timestamp"]):
+        data = {"date": timestamp.date()}
+        for key in BAR_STATISTICS:
+            data[key] = stats[key][index]
+        data["ticks"] = int(data["ticks"])
+        data["buyTicks"] = int(data["buyTicks"])
+        data["topN"] = top[index]
+        data.update(extra)
+        samples.append(data)
+    return samples
+
+
+def get_bar_statistics(data_frame, stops, start=0):
+    """
+    Bars are consecutive, from start to each stop, inclusive. Stops are
+    positions, not labels. Statistics of all bars are reduced at once, and
+    returned as arrays, with the start and stop of each bar.
+    """
+    stops = np.asarray(stops, dtype=np.int64)
+    starts = np.append(start, stops[:-1] + 1)[: len(stops)]
+    if not len(stops):
+        return {key: np.zeros(0) for key in ("start", "stop") + BAR_STATISTICS}
+    df = data_frame.iloc[start : stops[-1] + 1]
+    first = starts - start
+    last = stops - start
+    price = df.price.to_numpy()
+    is_buy = df.tickRule.to_numpy() == 1
+    stats = {
+        "start": starts,
+        "stop": stops,
+        "timestamp": df.timestamp.array[last],
+        "nanoseconds": df.nanoseconds.to_numpy()[last],
+        "open": price[first],
+        "high": np.maximum.reduceat(price, first),
+        "low": np.minimum.reduceat(price, first),
+        "close": price[last],
+    }
+    for key, buy_key in (
+        ("slippage", "buySlippage"),
+        ("volume", "buyVolume"),
+        ("notional", "buyNotional"),
+    ):
+        values = df[key].to_numpy()
+        stats[key] = np.add.reduceat(values, first)
+        stats[buy_key] = np.add.reduceat(np.where(is_buy, values, 0), first)
+    stats["ticks"] = last - first + 1
+    stats["buyTicks"] = np.add.reduceat(is_buy.astype(np.int64), first)
+    return stats
+
+
+def get_top_n_bars(data_frame, starts, stops, top_n=10):
+    """
+    Largest N trades by volume of each bar, as nlargest keep="first", sorted by
+    timestamp and nanoseconds. All bars with one sort.
+    """
+    if not top_n or not len(starts):
+        return [[] for _ in starts]
+    start = starts[0]
+    stop = stops[-1]
+    df = data_frame.iloc[start : stop + 1]
+    lengths = np.diff(np.append(starts, stop + 1))
+    bars = np.repeat(np.arange(len(starts)), lengths)
+    # Stable, so equal volumes are in order, as nlargest keep="first"
+    order = np.lexsort((-df.volume.to_numpy(), bars))
+    rank = np.arange(len(order)) - np.repeat(starts - start, lengths)
+    selected = order[rank < top_n]
+    columns = [column for column in df.columns if column in TOP_N_COLUMNS]
+    records = df.iloc[selected][columns].to_dict("records")
+    top = [[] for _ in starts]
+    for bar, record in zip(bars[selected], records):
+        top[bar].append(record)
+    for t in top:
+        t.sort(key=itemgetter("timestamp", "nanoseconds"))
+    return top
 
 
 def merge_cache(previous, current, top_n=10):
@@ -84,14 +145,8 @@ def merge_cache(previous, current, top_n=10):
         "buyTicks",
     ):
         current[key] += previous[key]
-    # Top N
-    merged_top = previous["topN"] + current["topN"]
-    if len(merged_top):
-        # Sort by volume
-        sorted(merged_top, key=lambda x: x["volume"], reverse=True)
-        # Slice top_n
-        m = merged_top[:top_n]
-        # Sort by timestamp, nanoseconds
-        sorted(m, key=itemgetter("timestamp", "nanoseconds"))
-        current["topN"] = m
+    # Top N, previous is first
+    top = TopN(top_n, previous["topN"])
+    top.extend(current["topN"])
+    current["topN"] = top.to_records()
     return current
@@ -1,3 +1,4 @@
+from .multi import MultiThresholdAggregator
 from .threshold import ThresholdAggregator
 
-__all__ = ["ThresholdAggregator"]
+__all__ = ["MultiThresholdAggregator", "ThresholdAggregator"]
@@ -1,3 +1,5 @@
+from functools import partial
+
 from google.cloud import bigquery
 
 from ...bqloader import (
@@ -10,6 +12,7 @@ from ...bqloader import (
 from ...fscache import firestore_data
 from ...utils import date_range
 from ..base import BaseAggregator
+from .lib import DERIVED_COLUMNS, preprocess_data_frame
 
 
 class BaseThresholdAggregator(BaseAggregator):
@@ -31,6 +34,7 @@ class BaseThresholdAggregator(BaseAggregator):
         date_from=None,
         date_to=None,
         has_multiple_symbols=False,
+        backfill=0,
         verbose=False,
     ):
         super().__init__(
@@ -54,6 +58,7 @@ class BaseThresholdAggregator(BaseAggregator):
         self.max_exponent = max_exponent
         self.tick_rule = tick_rule
         self.top_n = top_n
+        self.backfill = backfill
 
     @property
     def schema(self):
@@ -77,6 +82,7 @@ class BaseThresholdAggregator(BaseAggregator):
                     self.write(data, cache)
                 elif self.verbose:
                     print(f"{self.log_prefix}: {document} OK")
+        self.flush()
         print(
             f"{self.log_prefix}: "
             f"{self.date_from.isoformat()} to {self.date_to.isoformat()} OK"
@@ -88,6 +94,8 @@ class BaseThresholdAggregator(BaseAggregator):
             # Query by partition.
             bigquery.ScalarQueryParameter("date", "DATE", self.date),
             bigquery.ScalarQueryParameter("symbol", "STRING", self.symbol),
+            bigquery.ScalarQueryParameter("min_slippage", "FLOAT", self.min_slippage),
+            bigquery.ScalarQueryParameter("max_slippage", "FLOAT", self.max_slippage),
             bigquery.ScalarQueryParameter("min_volume", "INTEGER", self.min_volume),
             bigquery.ScalarQueryParameter("max_volume", "INTEGER", self.max_volume),
             bigquery.ScalarQueryParameter("min_exponent", "INTEGER", self.min_exponent),
@@ -138,34 +146,10 @@ class BaseThresholdAggregator(BaseAggregator):
         return BigQueryLoader(self.source_table, self.date).read_table(sql, job_config)
 
     def preprocess_data_frame(self, data_frame):
-        data_frame["date"] = data_frame.apply(lambda x: x.timestamp.date(), axis=1)
-        data_frame["hour"] = data_frame.apply(lambda x: x.timestamp.hour, axis=1)
-        data_frame["buySlippage"] = data_frame.apply(
-            lambda x: x.slippage if x.tickRule == 1 else 0, axis=1
-        )
-        data_frame["sellSlippage"] = data_frame.apply(
-            lambda x: x.slippage if x.tickRule == -1 else 0, axis=1
-        )
-        data_frame["buyVolume"] = data_frame.apply(
-            lambda x: x.volume if x.tickRule == 1 else 0, axis=1
-        )
-        data_frame["sellVolume"] = data_frame.apply(
-            lambda x: x.volume if x.tickRule == -1 else 0, axis=1
-        )
-        data_frame["buyNotional"] = data_frame.apply(
-            lambda x: x.volume / x.price if x.tickRule == 1 else 0, axis=1
-        )
-        data_frame["sellNotional"] = data_frame.apply(
-            lambda x: x.volume / x.price if x.tickRule == -1 else 0, axis=1
-        )
-        data_frame["ticks"] = 1
-        data_frame["buyTicks"] = data_frame.apply(
-            lambda x: 1 if x.tickRule == 1 else 0, axis=1
-        )
-        data_frame["sellTicks"] = data_frame.apply(
-            lambda x: 1 if x.tickRule == -1 else 0, axis=1
-        )
-        return data_frame
+        # Only the threshold, others are derived if required.
+        is_derived = self.thresh_attr in DERIVED_COLUMNS
+        columns = (self.thresh_attr,) if is_derived else ()
+        return preprocess_data_frame(data_frame, columns=columns)
 
     def process_data_frame(self, data_frame):
         data_frame, cache = self.get_cache(data_frame)
@@ -183,11 +167,23 @@ class BaseThresholdAggregator(BaseAggregator):
         raise NotImplementedError
 
     def write(self, data, cache):
-        # BigQuery
         table_name = self.get_destination(sep="_")
-        bigquery_loader = BigQueryLoader(table_name, self.date)
-        bigquery_loader.write_table(self.schema, data)
-        # Firebase
-        self.set_firebase(
-            firestore_data(cache), attr="firestore_destination", is_complete=True
-        )
+        if self.backfill:
+            # Cache of the next date, until written to Firebase.
+            self.caches = {self.date: firestore_data(cache)}
+            callback = partial(
+                self.set_firebase,
+                firestore_data(cache),
+                is_complete=True,
+                date=self.date,
+                firestore_cache=self.firestore_destination,
+            )
+            self.write_batch(table_name, self.schema, data, callback)
+        else:
+            # BigQuery
+            bigquery_loader = BigQueryLoader(table_name, self.date)
+            bigquery_loader.write_table(self.schema, data)
+            # Firebase
+            self.set_firebase(
+                firestore_data(cache), attr="firestore_destination", is_complete=True
+            )
@@ -1,6 +1,24 @@
-from ..lib import aggregate_rows, get_next_cache
+import numpy as np
+
+from ..lib import aggregate_bars, get_next_cache
 from .constants import BUY_NOTIONAL, BUY_TICKS, BUY_VOLUME, NOTIONAL, TICKS, VOLUME
 
+# Rows past the guess, before scanning further.
+PADDING = 64
+DERIVED_COLUMNS = (
+    "date",
+    "hour",
+    "buySlippage",
+    "sellSlippage",
+    "buyVolume",
+    "sellVolume",
+    "buyNotional",
+    "sellNotional",
+    "ticks",
+    "buyTicks",
+    "sellTicks",
+)
+
 
 def parse_thresh_attr(thresh_attr):
     assert thresh_attr in (VOLUME, BUY_VOLUME, NOTIONAL, BUY_NOTIONAL, TICKS, BUY_TICKS)
@@ -11,20 +29,79 @@ def get_initial_threshold_cache(thresh_attr, thresh_value):
     return {thresh_attr: 0, "target": thresh_value}
 
 
-def aggregate_threshold(data_frame, cache, thresh_attr, top_n=10):
+def preprocess_data_frame(data_frame, columns=DERIVED_COLUMNS):
+    """Derive columns, by default all, from tickRule."""
+    tick_rule = data_frame.tickRule.to_numpy()
+    for column in columns:
+        data_frame[column] = derive_column(data_frame, column, tick_rule)
+    return data_frame
+
+
+def get_column(data_frame, column):
+    """Derive column, if not already."""
+    if column not in data_frame.columns:
+        data_frame = preprocess_data_frame(data_frame, columns=(column,))
+    return data_frame[column]
+
+
+def derive_column(data_frame, column, tick_rule):
+    if column == "date":
+        return data_frame.timestamp.dt.date
+    elif column == "hour":
+        return data_frame.timestamp.dt.hour
+    elif column == "ticks":
+        return 1
+    elif column.startswith("buy") or column.startswith("sell"):
+        is_side = tick_rule == (1 if column.startswith("buy") else -1)
+        key = column.replace("buy", "").replace("sell", "").lower()
+        if key == "notional":
+            # Volume divided by price, as before.
+            values = data_frame.volume / data_frame.price
+        elif key == "ticks":
+            values = 1
+        else:
+            values = data_frame[key]
+        return np.where(is_side, values, 0)
+    else:
+        raise NotImplementedError
+
+
+def get_threshold_stops(values, value, target):
+    """
+    Last row of each bar, and the partial sum of the last bar. Cumulative sum
+    guesses where each bar stops. However, each bar is summed from its start,
+    in order, so float boundaries are equal to summing row by row.
+    """
+    cumsum = np.cumsum(values)
+    stops = []
     start = 0
-    samples = []
-    for index, row in data_frame.iterrows():
-        cache[thresh_attr] += row[thresh_attr]
-        if cache[thresh_attr] >= cache["target"]:
-            sample = aggregate_rows(data_frame, start, stop=index, top_n=top_n)
-            samples.append(sample)
-            # Reinitialize cache
-            cache[thresh_attr] = 0
-            # Next index
+    while start < len(values):
+        offset = cumsum[start - 1] if start else 0
+        guess = np.searchsorted(cumsum, offset + target - value)
+        stop = min(guess + PADDING, len(values))
+        total = np.cumsum(np.append(value, values[start:stop]))[1:]
+        is_stop = total >= target
+        if is_stop.any():
+            index = start + int(np.argmax(is_stop))
+            stops.append(index)
+            # Reinitialize
+            value = 0
             start = index + 1
+        else:
+            value = total[-1]
+            start = stop
+    return stops, value
+
+
+def aggregate_threshold(data_frame, cache, thresh_attr, top_n=10):
+    values = get_column(data_frame, thresh_attr).to_numpy()
+    stops, value = get_threshold_stops(values, cache[thresh_attr], cache["target"])
+    samples = aggregate_bars(data_frame, stops, top_n=top_n)
+    # Firestore doesn't like 64bit types
+    cache[thresh_attr] = value.item() if isinstance(value, np.generic) else value
     # Cache
+    start = stops[-1] + 1 if stops else 0
     is_last_row = start == len(data_frame)
     if not is_last_row:
-        cache = get_next_cache(data_frame, cache, start)
+        cache = get_next_cache(data_frame, cache, start, top_n=top_n)
     return samples, cache
@@ -0,0 +1,109 @@
+from ...utils import date_range
+from .lib import DERIVED_COLUMNS, preprocess_data_frame
+from .threshold import ThresholdAggregator
+
+
+class MultiThresholdAggregator:
+    """
+    Query, and preprocess, each day of the source table once. Bars are
+    aggregated for each threshold, with its own cache and destination table.
+    """
+
+    def __init__(
+        self,
+        source_table,
+        thresholds,
+        symbol=None,
+        min_slippage=None,
+        max_slippage=None,
+        min_volume=None,
+        max_volume=None,
+        min_notional=None,
+        max_notional=None,
+        min_exponent=None,
+        max_exponent=None,
+        tick_rule=None,
+        top_n=10,
+        date_from=None,
+        date_to=None,
+        has_multiple_symbols=False,
+        backfill=0,
+        verbose=False,
+    ):
+        self.source_table = source_table
+        self.verbose = verbose
+        self.consumers = []
+        # Destination table, thresh_attr, and thresh_value.
+        for destination_table, thresh_attr, thresh_value in thresholds:
+            self.register(
+                ThresholdAggregator(
+                    source_table,
+                    destination_table,
+                    thresh_attr,
+                    thresh_value,
+                    symbol=symbol,
+                    min_slippage=min_slippage,
+                    max_slippage=max_slippage,
+                    min_volume=min_volume,
+                    max_volume=max_volume,
+                    min_notional=min_notional,
+                    max_notional=max_notional,
+                    min_exponent=min_exponent,
+                    max_exponent=max_exponent,
+                    tick_rule=tick_rule,
+                    top_n=top_n,
+                    date_from=date_from,
+                    date_to=date_to,
+                    has_multiple_symbols=has_multiple_symbols,
+                    backfill=backfill,
+                    verbose=verbose,
+                )
+            )
+        assert self.consumers, "No thresholds."
+        self.date_from = min(consumer.date_from for consumer in self.consumers)
+        self.date_to = max(consumer.date_to for consumer in self.consumers)
+
+    @property
+    def log_prefix(self):
+        name = self.source_table.replace("_", " ")
+        return name[0].capitalize() + name[1:]  # Capitalize first letter
+
+    def register(self, consumer):
+        self.consumers.append(consumer)
+
+    def get_consumers(self, date):
+        document = date.isoformat()
+        # Source is shared.
+        if not self.consumers[0].firestore_source.has_data(document):
+            return []
+        consumers = []
+        for consumer in self.consumers:
+            if consumer.date_from <= date <= consumer.date_to:
+                if not consumer.firestore_destination.has_data(document):
+                    consumers.append(consumer)
+                elif consumer.verbose:
+                    print(f"{consumer.log_prefix}: {document} OK")
+        return consumers
+
+    def get_derived_columns(self, consumers):
+        thresh_attrs = [consumer.thresh_attr for consumer in consumers]
+        return [column for column in DERIVED_COLUMNS if column in thresh_attrs]
+
+    def main(self):
+        for date in date_range(self.date_from, self.date_to):
+            consumers = self.get_consumers(date)
+            if consumers:
+                for consumer in consumers:
+                    consumer.date = date
+                data_frame = consumers[0].get_data_frame()
+                columns = self.get_derived_columns(consumers)
+                data_frame = preprocess_data_frame(data_frame, columns=columns)
+                for consumer in consumers:
+                    data, cache = consumer.process_data_frame(data_frame)
+                    consumer.write(data, cache)
+        for consumer in self.consumers:
+            consumer.flush()
+        print(
+            f"{self.log_prefix}: "
+            f"{self.date_from.isoformat()} to {self.date_to.isoformat()} OK"
+        )
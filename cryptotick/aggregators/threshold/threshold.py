@@ -23,26 +23,28 @@ class ThresholdAggregator(BaseThresholdAggregator):
         date_from=None,
         date_to=None,
         has_multiple_symbols=False,
+        backfill=0,
         verbose=False,
     ):
         super().__init__(
             source_table,
             destination_table,
-            symbol=None,
-            min_slippage=None,
-            max_slippage=None,
-            min_volume=None,
-            max_volume=None,
-            min_notional=None,
-            max_notional=None,
-            min_exponent=None,
-            max_exponent=None,
-            tick_rule=None,
-            top_n=10,
-            date_from=None,
-            date_to=None,
-            has_multiple_symbols=False,
-            verbose=False,
+            symbol=symbol,
+            min_slippage=min_slippage,
+            max_slippage=max_slippage,
+            min_volume=min_volume,
+            max_volume=max_volume,
+            min_notional=min_notional,
+            max_notional=max_notional,
+            min_exponent=min_exponent,
+            max_exponent=max_exponent,
+            tick_rule=tick_rule,
+            top_n=top_n,
+            date_from=date_from,
+            date_to=date_to,
+            has_multiple_symbols=has_multiple_symbols,
+            backfill=backfill,
+            verbose=verbose,
         )
 
         self.thresh_attr = parse_thresh_attr(thresh_attr)
@@ -54,5 +56,5 @@ class ThresholdAggregator(BaseThresholdAggregator):
 
     def aggregate(self, data_frame, cache):
         return aggregate_threshold(
-            data_frame, cache, self.thresh_attr, self.thresh_value, top_n=self.top_n
+            data_frame, cache, self.thresh_attr, top_n=self.top_n
         )
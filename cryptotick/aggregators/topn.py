@@ -0,0 +1,80 @@
+import heapq
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+
+TOP_N_COLUMNS = (
+    "timestamp",
+    "nanoseconds",
+    "price",
+    "slippage",
+    "volume",
+    "notional",
+    "exponent",
+    "tickRule",
+)
+
+
+class TopN:
+    """
+    Largest trades by volume, in a bounded min heap. Equal volumes are kept in
+    the order pushed, as nlargest keep="first".
+    """
+
+    def __init__(self, top_n=10, records=()):
+        self.top_n = top_n
+        self.heap = []
+        self.count = 0
+        self.extend(records)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, record):
+        if not self.top_n:
+            return
+        # Count is unique, so records are not compared.
+        item = (record["volume"], -self.count, record)
+        self.count += 1
+        if len(self.heap) < self.top_n:
+            heapq.heappush(self.heap, item)
+        elif item[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, item)
+
+    def extend(self, records):
+        """Records, or columns of records, from the cache."""
+        if isinstance(records, dict):
+            records = [dict(zip(records, values)) for values in zip(*records.values())]
+        for record in records:
+            self.push(record)
+
+    def update(self, columns):
+        """Trades, e.g. a DataFrame, or a dict of arrays."""
+        volume = np.asarray(columns["volume"])
+        if not self.top_n or not len(volume):
+            return
+        # Stable, so equal volumes are in order
+        candidates = np.sort(np.argsort(-volume, kind="stable")[: self.top_n])
+        keys = [key for key in TOP_N_COLUMNS if key in columns]
+        values = [pd.Series(columns[key]).iloc[candidates].tolist() for key in keys]
+        for value in zip(*values):
+            self.push(dict(zip(keys, value)))
+
+    def merge(self, other):
+        """Other is later, e.g. next day."""
+        for _, _, record in sorted(other.heap, key=lambda item: -item[1]):
+            self.push(record)
+        return self
+
+    def to_records(self):
+        items = sorted(self.heap, key=lambda item: (-item[0], -item[1]))
+        records = [record for _, _, record in items]
+        records.sort(key=itemgetter("timestamp", "nanoseconds"))
+        return records
+
+    def to_cache(self):
+        """Columns of records, so keys are not repeated."""
+        records = self.to_records()
+        keys = [key for key in TOP_N_COLUMNS if records and key in records[0]]
+        return {key: [record[key] for record in records] for key in keys}
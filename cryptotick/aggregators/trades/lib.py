@@ -1,139 +1,92 @@
 import math
 
+import numpy as np
 import pandas as pd
 
+# Powers of 10 are exact floats, to 10 ** 22.
+MAX_EXPONENT = 22
 
-def is_sample(last_row, row, has_multiple_symbols=False):
-    if has_multiple_symbols:
-        is_equal_symbol = last_row.symbol == row.symbol
-    else:
-        is_equal_symbol = True
-    is_equal_timestamp = last_row.timestamp == row.timestamp
-    is_equal_nanoseconds = last_row.nanoseconds == row.nanoseconds
-    is_equal_tick = last_row.tickRule == row.tickRule
-    return (
-        not is_equal_symbol
-        or not is_equal_timestamp
-        or not is_equal_nanoseconds
-        or not is_equal_tick
-    )
 
-
-def aggregate_trades(data_frame, has_multiple_symbols=False):
-    idx = 0
-    samples = []
-    total_rows = len(data_frame) - 1
-    # Were there two or more trades?
-    if len(data_frame) > 1:
-        for row in data_frame.itertuples():
-            index = row.Index
-            last_index = index - 1
-            if index > 0:
-                is_last_iteration = index == total_rows
-                last_row = data_frame.loc[last_index]
-                # Is this the last iteration?
-                if is_last_iteration:
-                    last_row = data_frame.loc[idx]
-                    next_row = data_frame.loc[index]
-                    # If equal, one sample.
-                    if not is_sample(last_row, next_row, has_multiple_symbols):
-                        # Aggregate from idx to end of data frame.
-                        sample = data_frame.loc[idx:]
-                        samples.append(aggregate_trade(sample, has_multiple_symbols))
-                    # Otherwise, two samples.
-                    else:
-                        # Aggregate from idx to last_index
-                        sample = data_frame.loc[idx:last_index]
-                        samples.append(aggregate_trade(sample, has_multiple_symbols))
-                        # Append last row.
-                        sample = data_frame.loc[index:]
-                        assert len(sample) == 1
-                        samples.append(aggregate_trade(sample, has_multiple_symbols))
-                # Is the last row equal to the current row?
-                elif is_sample(last_row, row, has_multiple_symbols):
-                    # Aggregate from idx to last_index
-                    sample = data_frame.loc[idx:last_index]
-                    aggregated_sample = aggregate_trade(sample, has_multiple_symbols)
-                    samples.append(aggregated_sample)
-                    idx = index
-    # Only one trade in data_frame
-    elif len(data_frame) == 1:
-        aggregated_sample = aggregate_trade(data_frame)
-        samples.append(aggregated_sample)
-    # Instantiate dataframe
-    data_frame = pd.DataFrame(samples)
-    # Round slippage
-    data_frame.slippage = data_frame.slippage.round(6)
-    # Next, calculate exponent.
-    data_frame = calculate_exponent(data_frame)
-    return data_frame
+def get_run_starts(data_frame, columns):
+    """First row of each run of rows, with equal values of columns."""
+    is_start = np.zeros(len(data_frame), dtype=bool)
+    is_start[:1] = True
+    for column in columns:
+        values = data_frame[column].values
+        is_start[1:] |= values[1:] != values[:-1]
+    return np.flatnonzero(is_start)
 
 
-def aggregate_trade(data_frame, has_multiple_symbols=False):
-    last_row = data_frame.iloc[-1]
-    timestamp = last_row.timestamp
-    notional = data_frame.notional.sum()
-    if has_slippage(data_frame):
-        slippage = calculate_slippage(data_frame, notional)
+def aggregate_trades(data_frame, has_multiple_symbols=False):
+    """
+    Aggregate runs of trades with equal timestamp, nanoseconds, and tick rule.
+    If multiple symbols, also equal symbol.
+    """
+    columns = ["timestamp", "nanoseconds", "tickRule"]
+    if has_multiple_symbols:
+        columns.insert(0, "symbol")
+    starts = get_run_starts(data_frame, columns)
+    # Last row of each run.
+    last = np.append(starts[1:], len(data_frame))[: len(starts)] - 1
+    price = data_frame.price.values
+    volume = data_frame.volume.values
+    notional = data_frame.notional.values
+    if len(starts):
+        volume = np.add.reduceat(volume, starts)
+        notional = np.add.reduceat(notional, starts)
+        has_slippage = np.maximum.reduceat(price, starts) != np.minimum.reduceat(
+            price, starts
+        )
     else:
-        slippage = 0
+        has_slippage = np.zeros(0, dtype=bool)
+    slippage = calculate_slippage(price[starts], volume, notional, has_slippage)
+    timestamp = data_frame.timestamp.iloc[last].reset_index(drop=True)
     data = {
-        "date": timestamp.date(),
+        "date": timestamp.dt.date,
         "timestamp": timestamp,
-        "nanoseconds": last_row.nanoseconds,
-        "price": last_row.price,
+        "nanoseconds": data_frame.nanoseconds.values[last],
+        "price": price[last],
         "slippage": slippage,
-        "volume": data_frame.volume.sum(),
+        "volume": volume,
         "notional": notional,
-        "tickRule": last_row.tickRule,
+        "tickRule": data_frame.tickRule.values[last],
     }
     if has_multiple_symbols:
-        data.update({"symbol": last_row.symbol})
-    return data
-
-
-def has_slippage(data_frame):
-    if len(data_frame) > 1:
-        prices = data_frame.price.to_numpy()
-        first_price = prices[0]
-        # Are all the prices equal?
-        return not (first_price == prices).all()
-    return False
+        data["symbol"] = data_frame.symbol.values[last]
+    data_frame = pd.DataFrame(data)
+    # Round slippage
+    data_frame.slippage = data_frame.slippage.round(6)
+    # Next, calculate exponent.
+    data_frame = calculate_exponent(data_frame)
+    return data_frame
 
 
-def calculate_slippage(data_frame, notional):
-    first_row = data_frame.iloc[0]
-    expected = first_row.price * notional
-    vwap = volume_weighted_average_price(data_frame)
+def calculate_slippage(first_price, volume, notional, has_slippage):
+    """Difference of first price, and VWAP, times notional."""
+    expected = first_price * notional
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vwap = volume / notional
     actual = vwap * notional
-    return abs(expected - actual)
-
-
-def volume_weighted_average_price(data_frame):
-    vwap = data_frame.volume.cumsum() / data_frame.notional.cumsum()
-    return vwap.iloc[-1]
+    return np.where(has_slippage, np.abs(expected - actual), 0.0)
 
 
 def calculate_exponent(data_frame):
-    data_frame["exponent"] = data_frame.volume.apply(calc_exponent)
+    data_frame["exponent"] = calc_exponent(data_frame.volume.values)
     return data_frame
 
 
-def calc_exponent(volume, divisor=10, decimal_places=1):
-    if volume > 0:
-        is_round = volume % math.pow(divisor, decimal_places) == 0
-        if is_round:
-            decimal_places += 1
-            stop_execution = False
-            while not stop_execution:
-                is_round = volume % math.pow(divisor, decimal_places) == 0
-                if is_round:
-                    decimal_places += 1
-                else:
-                    stop_execution = True
-            return decimal_places - 1
-        else:
-            return 0
-    else:
-        # WTF Bybit!
-        return 0
+def calc_exponent(volume, divisor=10, max_exponent=MAX_EXPONENT):
+    """Trailing zeros of each volume, e.g. 1000 is 3."""
+    volume = np.asarray(volume, dtype="float64")
+    exponent = np.zeros(len(volume), dtype="int64")
+    # WTF Bybit! Zero, or negative, volume is 0.
+    candidates = np.flatnonzero(volume > 0)
+    for decimal_places in range(1, max_exponent + 1):
+        if not len(candidates):
+            break
+        with np.errstate(invalid="ignore"):
+            remainder = np.fmod(volume[candidates], math.pow(divisor, decimal_places))
+        # Round volumes remain candidates.
+        candidates = candidates[remainder == 0]
+        exponent[candidates] = decimal_places
+    return exponent
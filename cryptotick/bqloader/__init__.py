@@ -1,30 +1,45 @@
+from .batch import BatchLoader
 from .bqloader import BigQueryLoader
+from .client import close_clients, get_client
 from .lib import (
     get_schema_columns,
     get_table_id,
     get_table_name,
+    set_schema_types,
     stringify_datetime_types,
 )
+from .registry import clear_tables
 from .schema import (
     MULTIPLE_SYMBOL_AGGREGATE_SCHEMA,
     MULTIPLE_SYMBOL_BAR_SCHEMA,
+    MULTIPLE_SYMBOL_RENKO_SCHEMA,
     MULTIPLE_SYMBOL_SCHEMA,
     SINGLE_SYMBOL_AGGREGATE_SCHEMA,
     SINGLE_SYMBOL_BAR_SCHEMA,
+    SINGLE_SYMBOL_RENKO_SCHEMA,
     SINGLE_SYMBOL_SCHEMA,
 )
+from .staging import get_timings
 
 __all__ = [
     "SINGLE_SYMBOL_BAR_SCHEMA",
+    "SINGLE_SYMBOL_RENKO_SCHEMA",
     "SINGLE_SYMBOL_SCHEMA",
     "SINGLE_SYMBOL_AGGREGATE_SCHEMA",
     "MULTIPLE_SYMBOL_SCHEMA",
     "MULTIPLE_SYMBOL_AGGREGATE_SCHEMA",
     "MULTIPLE_SYMBOL_BAR_SCHEMA",
+    "MULTIPLE_SYMBOL_RENKO_SCHEMA",
     "row_to_json",
     "get_schema_columns",
     "get_table_id",
     "get_table_name",
+    "set_schema_types",
     "stringify_datetime_types",
     "BigQueryLoader",
+    "BatchLoader",
+    "get_client",
+    "close_clients",
+    "clear_tables",
+    "get_timings",
 ]
@@ -0,0 +1,109 @@
+import datetime
+import os
+import time
+from uuid import uuid4
+
+import pyarrow as pa
+from google.cloud import bigquery
+
+from ..constants import BIGQUERY_DATASET
+from .bqloader import BigQueryLoader
+from .client import get_client
+from .lib import get_schema_columns
+from .staging import add_timing, get_parquet_job_config, to_arrow_table, to_parquet
+
+BATCH = "batch"
+# Staging tables expire, if not deleted.
+STAGING_EXPIRATION = datetime.timedelta(days=1)
+
+
+class BatchLoader:
+    """
+    Dates are buffered, as Arrow tables, and loaded at once. Buffered dates
+    are loaded into a staging table, then the partitions of the destination
+    table are replaced in one transaction. Callbacks, e.g. Firestore, are
+    called after the transaction is committed, in order.
+    """
+
+    def __init__(self, table_name, schema, max_dates=31, max_memory=2048, client=None):
+        self.bq = client or get_client()
+        self.dataset = os.environ[BIGQUERY_DATASET]
+        self.table_name = table_name
+        self.schema = schema
+        self.max_dates = max_dates
+        # Maximum memory of buffered tables, in MB.
+        self.max_memory = max_memory
+        # Date, table, and callback.
+        self.pending = []
+
+    def __len__(self):
+        return len(self.pending)
+
+    @property
+    def memory_usage(self):
+        return (
+            sum(table.nbytes for _, table, _ in self.pending if table is not None) / 1e6
+        )
+
+    def add(self, date, data, callback=None):
+        # Data frame, or records, maybe no rows
+        table = to_arrow_table(data, self.schema) if len(data) else None
+        self.pending.append((date, table, callback))
+        if len(self) >= self.max_dates or self.memory_usage > self.max_memory:
+            self.flush()
+
+    def flush(self):
+        pending, self.pending = self.pending, []
+        if not pending:
+            return
+        tables = [table for _, table, _ in pending if table is not None]
+        bigquery_loader = BigQueryLoader(self.table_name, None, client=self.bq)
+        if not bigquery_loader.table_exists():
+            bigquery_loader.create_table(self.schema)
+        if tables:
+            dates = sorted({date for date, table, _ in pending if table is not None})
+            self.replace_partitions(dates, pa.concat_tables(tables))
+        for _, _, callback in sorted(pending, key=lambda p: p[0]):
+            if callback:
+                callback()
+
+    def get_staging_table_id(self):
+        suffix = uuid4().hex[:8]
+        return f"{self.bq.project}.{self.dataset}.{self.table_name}_staging_{suffix}"
+
+    def replace_partitions(self, dates, table):
+        start = time.time()
+        parquet = to_parquet(table)
+        size = parquet.getbuffer().nbytes
+        converted = time.time()
+        staging_table_id = self.get_staging_table_id()
+        staging_table = bigquery.Table(staging_table_id, schema=self.schema)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        staging_table.expires = now + STAGING_EXPIRATION
+        self.bq.create_table(staging_table)
+        try:
+            job_config = get_parquet_job_config(self.schema)
+            self.bq.load_table_from_file(
+                parquet, staging_table_id, job_config=job_config
+            ).result()
+            self.swap_partitions(dates, staging_table_id)
+        finally:
+            self.bq.delete_table(staging_table_id, not_found_ok=True)
+        add_timing(
+            BATCH, convert=converted - start, load=time.time() - converted, size=size
+        )
+
+    def swap_partitions(self, dates, staging_table_id):
+        table_id = f"{self.bq.project}.{self.dataset}.{self.table_name}"
+        columns = ", ".join(get_schema_columns(self.schema))
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ArrayQueryParameter("dates", "DATE", dates)]
+        )
+        sql = f"""
+            BEGIN TRANSACTION;
+            DELETE FROM `{table_id}` WHERE date IN UNNEST(@dates);
+            INSERT INTO `{table_id}` ({columns})
+            SELECT {columns} FROM `{staging_table_id}`;
+            COMMIT TRANSACTION;
+        """
+        self.bq.query(sql, job_config=job_config).result()
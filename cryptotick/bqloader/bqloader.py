@@ -1,42 +1,40 @@
 import os
+import time
 
-import google.auth
 import pandas as pd
 from google.cloud import bigquery
+from google.cloud.exceptions import NotFound
 
-from ..constants import BIGQUERY_DATASET, BIGQUERY_LOCATION, PROJECT_ID
-from .lib import get_schema_columns, get_table_id
+from ..constants import BIGQUERY_DATASET
+from .client import get_client
+from .lib import get_schema_columns, get_table_id, set_schema_types
+from .registry import get_table_schema, invalidate_table, set_table, table_exists
+from .staging import (
+    PARQUET,
+    add_timing,
+    get_parquet_job_config,
+    get_staging,
+    to_arrow_table,
+    to_parquet,
+)
 
 
 class BigQueryLoader:
-    def __init__(self, table_name, date):
-        credentials, _ = google.auth.default(
-            scopes=["https://www.googleapis.com/auth/cloud-platform"]
-        )
-        self.bq = bigquery.Client(
-            credentials=credentials,
-            project=os.environ[PROJECT_ID],
-            location=os.environ.get(BIGQUERY_LOCATION, None),
-        )
+    """Table handle, with a shared client."""
 
+    def __init__(self, table_name, date, client=None, staging=None):
+        self.bq = client or get_client()
+        self.staging = staging or get_staging()
         self.dataset = os.environ[BIGQUERY_DATASET]
         self.table_id = get_table_id(table_name)
         self.table_name = table_name
         self.date = date
 
     def table_exists(self):
-        job_config = bigquery.QueryJobConfig(
-            query_parameters=[
-                bigquery.ScalarQueryParameter("table", "STRING", self.table_name)
-            ]
-        )
-        query = f"""
-            SELECT size_bytes FROM {self.dataset}.__TABLES__
-            WHERE table_id = @table;
-        """
-        job = self.bq.query(query, job_config=job_config)
-        rows = job.result()
-        return len(list(rows)) > 0
+        return table_exists(self.bq, self.dataset, self.table_name)
+
+    def get_schema(self):
+        return get_table_schema(self.bq, self.dataset, self.table_name)
 
     def create_table(self, schema):
         table_id = f"{self.bq.project}.{self.dataset}.{self.table_name}"
@@ -45,7 +43,9 @@ class BigQueryLoader:
         table.time_partitioning = bigquery.TimePartitioning(
             type_=bigquery.TimePartitioningType.DAY, field="date"
         )
-        table = self.bq.create_table(table)
+        # Maybe created by another process.
+        table = self.bq.create_table(table, exists_ok=True)
+        set_table(self.bq, self.dataset, self.table_name, table.schema)
 
     def read_table(self, sql, job_config):
         query = self.bq.query(sql, job_config=job_config)
@@ -54,26 +54,53 @@ class BigQueryLoader:
     def write_table(self, schema, data):
         if not self.table_exists():
             self.create_table(schema)
+        # If data_frame, maybe no rows
+        if isinstance(data, pd.DataFrame) and not len(data):
+            return
         # Partition by date.
         decorator = self.date.strftime("%Y%m%d")
         partition = f"{self.table_id}${decorator}"
-        job_config = bigquery.LoadJobConfig(
-            schema=schema, write_disposition="WRITE_TRUNCATE"
-        )
-        if isinstance(data, pd.DataFrame):
-            # If data_frame, get columns
-            if len(data):
-                columns = get_schema_columns(schema)
-                data = data[columns]
-                self.bq.load_table_from_dataframe(
-                    data, partition, job_config=job_config
-                ).result()
-        else:
-            # If json, assume correct
-            self.bq.load_table_from_json(
-                data, partition, job_config=job_config
+        try:
+            self.load(schema, data, partition)
+        except NotFound:
+            # Deleted by another process, since listed.
+            invalidate_table(self.bq, self.dataset, self.table_name)
+            self.create_table(schema)
+            self.load(schema, data, partition)
+
+    def load(self, schema, data, destination, write_disposition="WRITE_TRUNCATE"):
+        start = time.time()
+        if self.staging == PARQUET:
+            parquet = to_parquet(to_arrow_table(data, schema))
+            size = parquet.getbuffer().nbytes
+            job_config = get_parquet_job_config(schema, write_disposition)
+            converted = time.time()
+            self.bq.load_table_from_file(
+                parquet, destination, job_config=job_config
             ).result()
+        else:
+            size = None
+            job_config = bigquery.LoadJobConfig(
+                schema=schema, write_disposition=write_disposition
+            )
+            if isinstance(data, pd.DataFrame):
+                # If data_frame, get columns
+                columns = get_schema_columns(schema)
+                data = set_schema_types(data[columns], schema)
+                load = self.bq.load_table_from_dataframe
+            else:
+                # If json, assume correct
+                load = self.bq.load_table_from_json
+            converted = time.time()
+            load(data, destination, job_config=job_config).result()
+        add_timing(
+            self.staging,
+            convert=converted - start,
+            load=time.time() - converted,
+            size=size,
+        )
 
     def delete_table(self):
         if self.table_exists():
-            self.bq.delete_table(self.table_id)
+            self.bq.delete_table(self.table_id, not_found_ok=True)
+            invalidate_table(self.bq, self.dataset, self.table_name)
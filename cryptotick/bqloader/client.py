@@ -0,0 +1,44 @@
+import os
+import threading
+
+import google.auth
+from google.cloud import bigquery
+
+from ..constants import BIGQUERY_LOCATION, PROJECT_ID
+
+SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
+
+clients = {}
+lock = threading.Lock()
+
+
+def get_client(project=None, location=None, credentials=None):
+    """
+    Process wide client per project, location, and credentials. Clients
+    survive across Cloud Function invocations, in the same instance.
+    """
+    project = project or os.environ[PROJECT_ID]
+    location = location or os.environ.get(BIGQUERY_LOCATION, None)
+    # Default credentials, if None.
+    key = (project, location, credentials)
+    client = clients.get(key)
+    if client is None:
+        with lock:
+            client = clients.get(key)
+            if client is None:
+                if credentials is None:
+                    creds, _ = google.auth.default(scopes=SCOPES)
+                else:
+                    creds = credentials
+                client = bigquery.Client(
+                    credentials=creds, project=project, location=location
+                )
+                clients[key] = client
+    return client
+
+
+def close_clients():
+    with lock:
+        for client in clients.values():
+            client.close()
+        clients.clear()
@@ -1,5 +1,7 @@
 import os
 
+import pandas as pd
+
 from ..constants import BIGQUERY_DATASET, BIGQUERY_TABLES
 from ..utils import set_env_list
 
@@ -26,3 +28,24 @@ def stringify_datetime_types(data):
         if key in data:
             data[key] = data[key].isoformat()
     return data
+
+
+def set_schema_types(data_frame, schema):
+    """Types of the schema, e.g. if types are compact."""
+    columns = {}
+    for field in schema:
+        if field.name in data_frame.columns:
+            series = data_frame[field.name]
+            if field.field_type == "TIMESTAMP":
+                if pd.api.types.is_integer_dtype(series):
+                    # Nanoseconds since epoch.
+                    columns[field.name] = pd.to_datetime(series, unit="ns", utc=True)
+            elif field.field_type == "INTEGER":
+                if series.dtype != "int64":
+                    columns[field.name] = series.astype("int64")
+            elif field.field_type == "STRING":
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    columns[field.name] = series.astype(object)
+    if columns:
+        return data_frame.assign(**columns)
+    return data_frame
@@ -0,0 +1,48 @@
+import threading
+
+# Schema by table name, by project and dataset. Schema is None, until read.
+tables = {}
+lock = threading.Lock()
+
+
+def get_tables(client, dataset):
+    """Tables of the dataset, listed once."""
+    key = (client.project, dataset)
+    dataset_tables = tables.get(key)
+    if dataset_tables is None:
+        with lock:
+            dataset_tables = tables.get(key)
+            if dataset_tables is None:
+                dataset_tables = {
+                    table.table_id: None for table in client.list_tables(dataset)
+                }
+                tables[key] = dataset_tables
+    return dataset_tables
+
+
+def table_exists(client, dataset, table_name):
+    return table_name in get_tables(client, dataset)
+
+
+def get_table_schema(client, dataset, table_name):
+    dataset_tables = get_tables(client, dataset)
+    if table_name in dataset_tables:
+        if dataset_tables[table_name] is None:
+            table = client.get_table(f"{client.project}.{dataset}.{table_name}")
+            dataset_tables[table_name] = table.schema
+        return dataset_tables[table_name]
+
+
+def set_table(client, dataset, table_name, schema=None):
+    """Table was created."""
+    get_tables(client, dataset)[table_name] = schema
+
+
+def invalidate_table(client, dataset, table_name):
+    """Table was deleted, maybe by another process."""
+    get_tables(client, dataset).pop(table_name, None)
+
+
+def clear_tables():
+    with lock:
+        tables.clear()
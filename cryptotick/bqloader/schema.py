@@ -91,3 +91,17 @@ MULTIPLE_SYMBOL_BAR_SCHEMA = [
     bigquery.SchemaField("date", "DATE", "REQUIRED"),
     bigquery.SchemaField("symbol", "STRING", "REQUIRED"),
 ] + SINGLE_SYMBOL_BAR_SCHEMA[1:]
+
+SINGLE_SYMBOL_RENKO_SCHEMA = (
+    SINGLE_SYMBOL_BAR_SCHEMA[:-2]
+    + [
+        bigquery.SchemaField("level", "FLOAT", "REQUIRED"),
+        bigquery.SchemaField("change", "FLOAT", "REQUIRED"),
+    ]
+    + SINGLE_SYMBOL_BAR_SCHEMA[-2:]
+)
+
+MULTIPLE_SYMBOL_RENKO_SCHEMA = [
+    bigquery.SchemaField("date", "DATE", "REQUIRED"),
+    bigquery.SchemaField("symbol", "STRING", "REQUIRED"),
+] + SINGLE_SYMBOL_RENKO_SCHEMA[1:]
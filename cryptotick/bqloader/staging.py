@@ -0,0 +1,140 @@
+import io
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from google.cloud import bigquery
+
+from ..constants import BIGQUERY_STAGING
+from .lib import set_schema_types
+
+PARQUET = "parquet"
+# Data frames with load_table_from_dataframe, and records with JSON.
+LEGACY = "legacy"
+STAGING = (PARQUET, LEGACY)
+
+COMPRESSION = "snappy"
+
+ARROW_TYPES = {
+    "DATE": pa.date32(),
+    "TIMESTAMP": pa.timestamp("us", tz="UTC"),
+    "INTEGER": pa.int64(),
+    "FLOAT": pa.float64(),
+    "STRING": pa.string(),
+    "BOOLEAN": pa.bool_(),
+}
+
+# Loads, seconds, and bytes, by staging path.
+timings = {}
+lock = threading.Lock()
+
+
+def get_staging():
+    staging = os.environ.get(BIGQUERY_STAGING, None) or PARQUET
+    assert staging in STAGING
+    return staging
+
+
+def get_arrow_field(field):
+    return pa.field(
+        field.name, get_arrow_type(field), nullable=field.mode != "REQUIRED"
+    )
+
+
+def get_arrow_type(field):
+    if field.field_type == "RECORD":
+        arrow_type = pa.struct([get_arrow_field(f) for f in field.fields])
+    else:
+        arrow_type = ARROW_TYPES[field.field_type]
+    if field.mode == "REPEATED":
+        return pa.list_(arrow_type)
+    return arrow_type
+
+
+def get_arrow_schema(schema):
+    return pa.schema([get_arrow_field(field) for field in schema])
+
+
+def get_arrow_array(values, field):
+    """Values are a column of a data frame, or of records."""
+    if field.field_type == "RECORD":
+        if field.mode == "REPEATED":
+            lengths = [len(value) for value in values]
+            offsets = np.append(0, np.cumsum(lengths, dtype=np.int32))
+            records = [record for value in values for record in value]
+            struct = get_struct_array(records, field.fields)
+            return pa.ListArray.from_arrays(pa.array(offsets, pa.int32()), struct)
+        return get_struct_array(values, field.fields)
+    series = pd.Series(values)
+    if field.field_type == "TIMESTAMP":
+        # Maybe strings, from stringify_datetime_types.
+        if not pd.api.types.is_datetime64_any_dtype(series):
+            series = pd.to_datetime(series, utc=True)
+        elif series.dt.tz is None:
+            series = series.dt.tz_localize("UTC")
+    elif field.field_type == "DATE":
+        if len(series) and isinstance(series.iloc[0], str):
+            series = pd.to_datetime(series).dt.date
+    return pa.Array.from_pandas(series, type=ARROW_TYPES[field.field_type])
+
+
+def get_struct_array(records, fields):
+    arrays = [
+        get_arrow_array([record[field.name] for record in records], field)
+        for field in fields
+    ]
+    return pa.StructArray.from_arrays(
+        arrays, fields=[get_arrow_field(field) for field in fields]
+    )
+
+
+def to_arrow_table(data, schema):
+    """Data frame, or records, with the types of the schema."""
+    if isinstance(data, pd.DataFrame):
+        data = set_schema_types(data, schema)
+        columns = {field.name: data[field.name] for field in schema}
+    else:
+        columns = {field.name: [d[field.name] for d in data] for field in schema}
+    arrays = [get_arrow_array(columns[field.name], field) for field in schema]
+    return pa.Table.from_arrays(arrays, schema=get_arrow_schema(schema))
+
+
+def to_parquet(table, compression=COMPRESSION):
+    stream = pa.BufferOutputStream()
+    pq.write_table(table, stream, compression=compression)
+    return io.BytesIO(stream.getvalue().to_pybytes())
+
+
+def get_parquet_job_config(schema, write_disposition="WRITE_TRUNCATE"):
+    job_config = bigquery.LoadJobConfig(
+        schema=schema,
+        source_format=bigquery.SourceFormat.PARQUET,
+        write_disposition=write_disposition,
+    )
+    # Repeated records are lists, not nested records. Not available with
+    # earlier google-cloud-bigquery.
+    if hasattr(bigquery, "ParquetOptions"):
+        parquet_options = bigquery.ParquetOptions()
+        parquet_options.enable_list_inference = True
+        job_config.parquet_options = parquet_options
+    return job_config
+
+
+def add_timing(staging, convert=0, load=0, size=None):
+    with lock:
+        timing = timings.setdefault(
+            staging, {"loads": 0, "convert": 0, "load": 0, "bytes": 0}
+        )
+        timing["loads"] += 1
+        timing["convert"] += convert
+        timing["load"] += load
+        if size is not None:
+            timing["bytes"] += size
+
+
+def get_timings():
+    with lock:
+        return {key: dict(value) for key, value in timings.items()}
@@ -5,6 +5,10 @@ FIRESTORE_COLLECTIONS = "FIRESTORE_COLLECTIONS"
 BIGQUERY_LOCATION = "BIGQUERY_LOCATION"
 BIGQUERY_DATASET = "BIGQUERY_DATASET"
 BIGQUERY_TABLES = "BIGQUERY_TABLES"
+ARCHIVE_CACHE_DIRECTORY = "ARCHIVE_CACHE_DIRECTORY"
+ARCHIVE_CACHE_MAX_SIZE = "ARCHIVE_CACHE_MAX_SIZE"
+DTYPE_PROFILE = "DTYPE_PROFILE"
+BIGQUERY_STAGING = "BIGQUERY_STAGING"
 
 GCP_APPLICATION_CREDENTIALS = (
     GOOGLE_APPLICATION_CREDENTIALS,
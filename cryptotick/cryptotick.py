@@ -1,31 +1,50 @@
 import datetime
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
-import httpx
 import pandas as pd
 from ciso8601 import parse_datetime
 from google.api_core.exceptions import ServiceUnavailable
 
+from . import httpclient
 from .bqloader import (
     SINGLE_SYMBOL_SCHEMA,
+    BatchLoader,
     BigQueryLoader,
     get_schema_columns,
     get_table_name,
+    set_schema_types,
 )
 from .fscache import FirestoreCache, firestore_data, get_collection_name
 from .s3downloader import (
     HistoricalDownloader,
     calculate_tick_rule,
+    get_dtype_profile,
+    get_memory_usage,
     row_to_json,
     set_columns,
     set_types,
     strip_nanoseconds,
     utc_timestamp,
 )
-from .utils import date_range, get_delta
+from .utils import date_range, get_delta, get_peak_memory_usage
+
+
+def get_future_memory_usage(future):
+    if future.exception() is None:
+        data_frame = future.result()
+        if data_frame is not None:
+            return get_memory_usage(data_frame)
+    return 0
 
 
 class CryptoExchangeETL:
+    # Maximum number of dates buffered, and loaded at once. If 0, each date is
+    # loaded separately.
+    backfill = 0
+
     def __init__(
         self,
         exchange,
@@ -62,6 +81,7 @@ class CryptoExchangeETL:
 
         # State.
         self.date = self.date_to
+        self.batch_loaders = {}
 
     @property
     def exchange_display(self):
@@ -74,6 +94,10 @@ class CryptoExchangeETL:
     def log_prefix(self):
         return f"{self.exchange_display} {self.symbol}"
 
+    @property
+    def dtype_profile(self):
+        return get_dtype_profile()
+
     @property
     def firestore_cache(self):
         suffix = self.get_suffix()
@@ -87,6 +111,14 @@ class CryptoExchangeETL:
                 print(f"{self.log_prefix}: {document} OK")
             return True
 
+    def print_memory_usage(self, data_frame):
+        memory_usage = get_memory_usage(data_frame)
+        peak_memory_usage = get_peak_memory_usage()
+        print(
+            f"{self.log_prefix}: {self.date.isoformat()} {memory_usage:.1f}MB, "
+            f"peak {peak_memory_usage:.1f}MB"
+        )
+
     def iter_hours(self, step=1):
         hour = datetime.datetime.combine(self.date, datetime.datetime.min.time())
         steps = 24 / step
@@ -135,8 +167,31 @@ class CryptoExchangeETL:
             data["candles"].append(candle)
         return data
 
-    def set_firebase(self, data, attr="firestore_cache", is_complete=False, retry=5):
-        document = self.date.isoformat()
+    def write_batch(self, table_name, schema, data, callback):
+        """Buffer data of the date. Callback after the date is loaded."""
+        if table_name not in self.batch_loaders:
+            self.batch_loaders[table_name] = BatchLoader(
+                table_name, schema, max_dates=self.backfill
+            )
+        self.batch_loaders[table_name].add(self.date, data, callback)
+
+    def flush(self):
+        for batch_loader in self.batch_loaders.values():
+            batch_loader.flush()
+
+    def set_firebase(
+        self,
+        data,
+        attr="firestore_cache",
+        is_complete=False,
+        date=None,
+        firestore_cache=None,
+        retry=5,
+    ):
+        # Maybe buffered, so not the current date, or collection.
+        date = date or self.date
+        firestore_cache = firestore_cache or getattr(self, attr)
+        document = date.isoformat()
         # If dict, assume correct
         if isinstance(data, pd.DataFrame):
             data = self.get_firebase_data(data)
@@ -144,22 +199,28 @@ class CryptoExchangeETL:
         # Retry n times
         r = retry - 1
         try:
-            getattr(self, attr).set(document, data)
+            firestore_cache.set(document, data)
         except ServiceUnavailable as exception:
             if r == 0:
                 raise exception
             else:
                 time.sleep(1)
-                self.set_firebase(data, attr=attr, is_complete=is_complete, retry=r)
+                self.set_firebase(
+                    data,
+                    is_complete=is_complete,
+                    date=date,
+                    firestore_cache=firestore_cache,
+                    retry=r,
+                )
         else:
-            print(f"{self.log_prefix}: {self.date.isoformat()} OK")
+            print(f"{self.log_prefix}: {document} OK")
 
     def get_response(self, retry=5):
         e = None
         # Retry n times.
         for i in range(retry):
             try:
-                return httpx.get(self.url)
+                return httpclient.get(self.url)
             except Exception as exception:
                 e = exception
                 time.sleep(i + 1)
@@ -268,7 +329,7 @@ class RESTExchangeETL(CryptoExchangeETL):
         # Retry n times.
         for i in range(retry):
             try:
-                return httpx.get(self.url)
+                return httpclient.get(self.url)
             except Exception as exception:
                 e = exception
                 time.sleep(i + 1)
@@ -341,7 +402,12 @@ class RESTExchangeETL(CryptoExchangeETL):
         # Dataframe
         columns = get_schema_columns(self.schema)
         data_frame = pd.DataFrame(trades, columns=columns)
-        data_frame = set_types(data_frame)
+        data_frame = set_types(data_frame, profile=self.dtype_profile)
+        # Trades are already in memory, so one copy with types of the schema, for
+        # both BigQuery, and Firebase.
+        data_frame = set_schema_types(data_frame, self.schema)
+        if self.verbose:
+            self.print_memory_usage(data_frame)
         self.assert_data_frame(data_frame, trades)
         # Previous.
         document = get_delta(self.date, days=1).isoformat()
@@ -367,22 +433,25 @@ class RESTExchangeETL(CryptoExchangeETL):
 
 
 class S3CryptoExchangeETL(CryptoExchangeETL):
+    # Number of dates downloaded, and parsed, ahead of the current date.
+    prefetch = 0
+    # Maximum memory of prefetched data frames, in MB.
+    max_prefetch_memory = 2048
+
     def get_url(self, date):
         raise NotImplementedError
 
     def main(self):
-        for date in date_range(self.date_from, self.date_to, reverse=True):
-            date_display = date.isoformat()
-            if not self.has_data(date):
-                url = self.get_url(date)
-                if self.verbose:
-                    print(f"{self.log_prefix}: downloading {date_display}")
-                data_frame = HistoricalDownloader(url).main()
-                if data_frame is not None:
-                    self.process_dataframe(data_frame)
+        for date, data_frame in self.iter_data_frames():
+            self.date = date
+            if data_frame is not None:
+                self.process_dataframe(data_frame)
             # Next
             self.date = get_delta(date, days=-1)
 
+        # Buffered dates, before aggregation.
+        self.flush()
+
         if self.aggregate:
             self.aggregate_trigger()
 
@@ -391,10 +460,60 @@ class S3CryptoExchangeETL(CryptoExchangeETL):
             f"{self.date_to.isoformat()} OK"
         )
 
+    def iter_data_frames(self):
+        """
+        Download, and parse, the next dates in a thread pool, while the current
+        date is processed. Dates are yielded in reverse order. Prefetch stops
+        when prefetched data frames exceed max memory, until they are processed.
+        """
+        dates = date_range(self.date_from, self.date_to, reverse=True)
+        pending = deque()
+        memory_usage = {}
+        is_exhausted = False
+        with ThreadPoolExecutor(max_workers=max(self.prefetch, 1)) as executor:
+            while pending or not is_exhausted:
+                while not is_exhausted and len(pending) <= self.prefetch:
+                    if self.is_prefetch_memory_exceeded(pending, memory_usage):
+                        break
+                    date = next(dates, None)
+                    if date is None:
+                        is_exhausted = True
+                    else:
+                        pending.append((date, self.prefetch_date(executor, date)))
+                if pending:
+                    date, future = pending.popleft()
+                    if future:
+                        memory_usage.pop(future, None)
+                        yield date, future.result()
+                    else:
+                        yield date, None
+
+    def prefetch_date(self, executor, date):
+        # Has data may depend on date, e.g. active futures.
+        self.date = date
+        if not self.has_data(date):
+            url = self.get_url(date)
+            if url:
+                if self.verbose:
+                    print(f"{self.log_prefix}: downloading {date.isoformat()}")
+                # Downloader may also depend on date.
+                downloader = self.get_downloader(url)
+                return executor.submit(downloader.main)
+
+    def is_prefetch_memory_exceeded(self, pending, memory_usage):
+        for _, future in pending:
+            if future and future.done() and future not in memory_usage:
+                memory_usage[future] = get_future_memory_usage(future)
+        total = sum(memory_usage.values())
+        return total > self.max_prefetch_memory
+
     def aggregate_trigger(self):
         # Intended for GCP
         raise NotImplementedError
 
+    def get_downloader(self, url):
+        return HistoricalDownloader(url, dtype_profile=self.dtype_profile)
+
     def process_dataframe(self, data_frame):
         data_frame = self.parse_dataframe(data_frame)
         if len(data_frame):
@@ -405,24 +524,40 @@ class S3CryptoExchangeETL(CryptoExchangeETL):
     def parse_dataframe(self, data_frame):
         # Transforms
         data_frame = utc_timestamp(data_frame)
-        data_frame = strip_nanoseconds(data_frame)
+        data_frame = strip_nanoseconds(data_frame, profile=self.dtype_profile)
         data_frame = set_columns(data_frame)
-        data_frame = calculate_tick_rule(data_frame)
+        data_frame = calculate_tick_rule(data_frame, profile=self.dtype_profile)
         return data_frame
 
     def write(self, data_frame):
         # Types
-        data_frame = set_types(data_frame)
+        data_frame = set_types(data_frame, profile=self.dtype_profile)
         # Columns
         columns = get_schema_columns(self.schema)
         data_frame = data_frame[columns]
-        # BigQuery
+        if self.verbose:
+            self.print_memory_usage(data_frame)
+        # BigQuery, types of the schema are converted when loaded.
         suffix = self.get_suffix(sep="_")
         table_name = get_table_name(self.exchange, suffix=suffix)
-        bigquery_loader = BigQueryLoader(table_name, self.date)
-        bigquery_loader.write_table(self.schema, data_frame)
-        # Firebase
-        self.set_firebase(data_frame, is_complete=True)
+        if self.backfill:
+            # Firebase, after the date is loaded. Symbol may change, e.g. multiple
+            # symbols, so the collection is of the current symbol.
+            data = self.get_firebase_data(set_schema_types(data_frame, self.schema))
+            callback = partial(
+                self.set_firebase,
+                data,
+                is_complete=True,
+                date=self.date,
+                firestore_cache=self.firestore_cache,
+            )
+            self.write_batch(table_name, self.schema, data_frame, callback)
+        else:
+            bigquery_loader = BigQueryLoader(table_name, self.date)
+            bigquery_loader.write_table(self.schema, data_frame)
+            # Firebase, with types of the schema.
+            data_frame = set_schema_types(data_frame, self.schema)
+            self.set_firebase(data_frame, is_complete=True)
 
 
 class FuturesETL(CryptoExchangeETL):
@@ -66,5 +66,12 @@ def firestore_data(data, strip_date=True):
     if "nextDay" in data:
         data["nextDay"] = firestore_data(data["nextDay"])
     if "topN" in data:
-        data["topN"] = [firestore_data(t) for t in data["topN"]]
+        top_n = data["topN"]
+        # Maybe columns of records
+        if isinstance(top_n, dict):
+            records = [dict(zip(top_n, values)) for values in zip(*top_n.values())]
+            records = [firestore_data(record) for record in records]
+            data["topN"] = {key: [r[key] for r in records] for key in top_n}
+        else:
+            data["topN"] = [firestore_data(t) for t in top_n]
     return data
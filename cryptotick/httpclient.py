@@ -0,0 +1,80 @@
+import importlib.util
+import threading
+
+import httpx
+
+# HTTP/2 requires the optional h2 package.
+HAS_HTTP2 = importlib.util.find_spec("h2") is not None
+
+settings = {
+    "http2": False,
+    # Seconds
+    "timeout": 5.0,
+    # Connections per host.
+    "max_connections": 10,
+    "max_keepalive_connections": 10,
+}
+
+clients = {}
+lock = threading.Lock()
+
+
+def configure(
+    http2=None, timeout=None, max_connections=None, max_keepalive_connections=None
+):
+    """Settings for clients created after configure, e.g. on startup."""
+    for key, value in (
+        ("http2", http2),
+        ("timeout", timeout),
+        ("max_connections", max_connections),
+        ("max_keepalive_connections", max_keepalive_connections),
+    ):
+        if value is not None:
+            settings[key] = value
+
+
+def get_client(url):
+    """
+    Process wide client per host, with keep-alive connections. Clients survive
+    across Cloud Function invocations, in the same instance.
+    """
+    u = httpx.URL(url)
+    key = (u.scheme, u.host, u.port)
+    client = clients.get(key)
+    if client is None:
+        with lock:
+            client = clients.get(key)
+            if client is None:
+                limits = httpx.Limits(
+                    max_connections=settings["max_connections"],
+                    max_keepalive_connections=settings["max_keepalive_connections"],
+                )
+                client = httpx.Client(
+                    http2=settings["http2"] and HAS_HTTP2,
+                    timeout=settings["timeout"],
+                    limits=limits,
+                )
+                clients[key] = client
+    return client
+
+
+def get(url, **kwargs):
+    return get_client(url).get(url, **kwargs)
+
+
+def head(url, **kwargs):
+    return get_client(url).head(url, **kwargs)
+
+
+def open_stream(method, url, **kwargs):
+    """Response is not read, so must be closed."""
+    client = get_client(url)
+    request = client.build_request(method, url, **kwargs)
+    return client.send(request, stream=True)
+
+
+def close_clients():
+    with lock:
+        for client in clients.values():
+            client.close()
+        clients.clear()
@@ -1,7 +1,12 @@
+from .archive import BitmexArchiveETL
 from .constants import BITMEX, XBT, XBTUSD
 from .futures import BitmexFuturesETL
 from .perpetual import BitmexPerpetualETL
-from .triggers import BitmexFuturesETLTrigger, BitmexPerpetualETLTrigger
+from .triggers import (
+    BitmexArchiveETLTrigger,
+    BitmexFuturesETLTrigger,
+    BitmexPerpetualETLTrigger,
+)
 
 __all__ = [
     "BITMEX",
@@ -11,4 +16,6 @@ __all__ = [
     "BitmexPerpetualETLTrigger",
     "BitmexFuturesETL",
     "BitmexFuturesETLTrigger",
+    "BitmexArchiveETL",
+    "BitmexArchiveETLTrigger",
 ]
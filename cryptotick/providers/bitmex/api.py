@@ -3,8 +3,7 @@ import json
 import re
 import time
 
-import httpx
-
+from ... import httpclient
 from .constants import API_URL, BITMEX, MAX_API_RESULTS, MIN_DATE, MONTHS, XBT, XBTUSD
 
 
@@ -98,7 +97,7 @@ def get_api_response(url, end_time=None):
     url += "&count=500&reverse=true"
     if end_time:
         url += f"&endTime={end_time}"
-    response = httpx.get(url)
+    response = httpclient.get(url)
     if response.status_code == 200:
         return response
     elif response.status_code == 429:
@@ -0,0 +1,100 @@
+from .base import BaseBitmexETL
+from .constants import BITMEX, MIN_DATE
+from .futures import BitmexFuturesETL
+from .perpetual import BitmexPerpetualETL
+
+
+class BitmexArchiveETL(BaseBitmexETL):
+    """
+    Download, and parse, each daily archive once. Symbols are sliced,
+    and routed to each consumer, e.g. perpetual symbols, or futures by root
+    symbol, which have no data for the date.
+    """
+
+    def __init__(
+        self,
+        symbols=None,
+        root_symbols=None,
+        date_from=None,
+        date_to=None,
+        aggregate=False,
+        prefetch=0,
+        backfill=0,
+        verbose=False,
+    ):
+        self.exchange = BITMEX
+        self.initialize_dates(MIN_DATE, date_from, date_to)
+        self.aggregate = aggregate
+        self.prefetch = prefetch
+        self.backfill = backfill
+        self.verbose = verbose
+        self.consumers = []
+        # Consumers without data, by date.
+        self.pending = {}
+        if symbols:
+            self.register(
+                BitmexPerpetualETL(
+                    symbols,
+                    date_from=date_from,
+                    date_to=date_to,
+                    backfill=backfill,
+                    verbose=verbose,
+                )
+            )
+        for root_symbol in root_symbols or []:
+            self.register(
+                BitmexFuturesETL(
+                    root_symbol,
+                    date_from=date_from,
+                    date_to=date_to,
+                    backfill=backfill,
+                    verbose=verbose,
+                )
+            )
+
+    @property
+    def log_prefix(self):
+        return f"{self.exchange_display} archive"
+
+    def register(self, consumer):
+        self.consumers.append(consumer)
+
+    def get_consumers(self, date):
+        consumers = []
+        for consumer in self.consumers:
+            # Active futures depend on date.
+            consumer.date = date
+            if not consumer.has_data(date):
+                consumers.append(consumer)
+        return consumers
+
+    def has_data(self, date):
+        """All consumers have data."""
+        consumers = self.get_consumers(date)
+        if consumers:
+            self.pending[date] = consumers
+            return False
+        return True
+
+    def get_symbols_filter(self):
+        symbols = []
+        for consumer in self.pending[self.date]:
+            consumer.date = self.date
+            symbols += consumer.get_symbols_filter()
+        return sorted(set(symbols))
+
+    def process_dataframe(self, data_frame):
+        """Slice dataframe by consumer symbols, and process each slice."""
+        for consumer in self.pending.pop(self.date, []):
+            consumer.date = self.date
+            symbols = consumer.get_symbols_filter()
+            df = data_frame[data_frame["symbol"].isin(symbols)].copy()
+            consumer.process_dataframe(df)
+
+    def flush(self):
+        for consumer in self.consumers:
+            consumer.flush()
+
+    def aggregate_trigger(self):
+        for consumer in self.consumers:
+            consumer.aggregate_trigger()
@@ -1,8 +1,8 @@
 import pandas as pd
 
 from ...cryptotick import S3CryptoExchangeETL
-from ...s3downloader import calculate_index, calculate_notional
-from .constants import URL
+from ...s3downloader import HistoricalDownloader, calculate_index, calculate_notional
+from .constants import TIMESTAMP_FORMAT, URL
 from .lib import calc_notional
 
 
@@ -11,6 +11,19 @@ class BaseBitmexETL(S3CryptoExchangeETL):
         date_string = date.strftime("%Y%m%d")
         return f"{URL}{date_string}.csv.gz"
 
+    def get_symbols_filter(self):
+        """Archive has all symbols, so filter while parsing."""
+        raise NotImplementedError
+
+    def get_downloader(self, url):
+        # Timestamp is parsed by the CSV reader.
+        return HistoricalDownloader(
+            url,
+            timestamp_format=TIMESTAMP_FORMAT,
+            symbols=self.get_symbols_filter(),
+            dtype_profile=self.dtype_profile,
+        )
+
     def parse_dataframe(self, data_frame):
         # No false positives.
         # Source: https://pandas.pydata.org/pandas-docs/stable/user_guide/
@@ -18,10 +31,11 @@ class BaseBitmexETL(S3CryptoExchangeETL):
         pd.options.mode.chained_assignment = None
         # Reset index.
         data_frame = calculate_index(data_frame)
-        # Timestamp
-        data_frame["timestamp"] = pd.to_datetime(
-            data_frame["timestamp"], format="%Y-%m-%dD%H:%M:%S.%f"
-        )
+        # Timestamp, if not parsed by the CSV reader.
+        if not pd.api.types.is_datetime64_any_dtype(data_frame["timestamp"]):
+            data_frame["timestamp"] = pd.to_datetime(
+                data_frame["timestamp"], format=TIMESTAMP_FORMAT
+            )
         data_frame = super().parse_dataframe(data_frame)
         # Notional after other transforms.
         data_frame = calculate_notional(data_frame, calc_notional)
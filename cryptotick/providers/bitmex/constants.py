@@ -4,6 +4,7 @@ BITMEX = "bitmex"
 MIN_DATE = datetime.date(2016, 5, 14)
 
 URL = "https://s3-eu-west-1.amazonaws.com/public.bitmex.com/data/trade/"
+TIMESTAMP_FORMAT = "%Y-%m-%dD%H:%M:%S.%f"
 
 API_URL = "https://www.bitmex.com/api/v1"
 MAX_API_RESULTS = 500
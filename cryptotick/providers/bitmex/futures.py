@@ -14,6 +14,8 @@ class BitmexFuturesETL(BaseBitmexETL, FuturesETL):
         date_to=None,
         schema=MULTIPLE_SYMBOL_AGGREGATE_SCHEMA,
         aggregate=False,
+        prefetch=0,
+        backfill=0,
         verbose=False,
     ):
         self.exchange = BITMEX
@@ -23,6 +25,8 @@ class BitmexFuturesETL(BaseBitmexETL, FuturesETL):
         self.symbol = self.symbols[0]["symbol"]
         self.schema = schema
         self.aggregate = aggregate
+        self.prefetch = prefetch
+        self.backfill = backfill
         self.verbose = verbose
 
     def get_symbols(self, root_symbol):
@@ -47,18 +51,8 @@ class BitmexFuturesETL(BaseBitmexETL, FuturesETL):
         # No active symbols 2016-10-01 to 2016-10-25.
         return super().has_data(date)
 
-    def process_dataframe(self, data_frame):
-        # Filter symbols.
-        query = " | ".join([f'symbol == "{s["symbol"]}"' for s in self.active_symbols])
-        data_frame = data_frame.query(query)
-        if len(data_frame):
-            df = self.parse_dataframe(data_frame)
-            if len(df):
-                self.write(df)
-            else:
-                print(f"{self.log_prefix}: No data")
-        else:
-            print(f"{self.log_prefix}: No data")
+    def get_symbols_filter(self):
+        return [s["symbol"] for s in self.active_symbols]
 
     def aggregate_trigger(self):
         table_name = get_table_name(BITMEX, suffix=self.get_suffix)
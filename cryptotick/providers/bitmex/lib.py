@@ -1,20 +1,22 @@
 import re
 
+from ...s3downloader import calc_contract_notional
+from ...s3downloader.constants import INVERSE, LINEAR, QUANTO
 from .constants import BCHUSD, ETHUSD, LTCUSD, XBTUSD, XRPUSD, uBTC
 
 XBT_FUTURES_REGEX = re.compile(r"^XBT(\w)\d+$")
 
+# Symbol pattern, and contract type and multiplier. First match.
+CONTRACTS = (
+    (re.compile(rf"^{XBTUSD}$"), (INVERSE, 1)),
+    (XBT_FUTURES_REGEX, (INVERSE, 1)),
+    (re.compile(rf"^({ETHUSD}|{BCHUSD})"), (QUANTO, uBTC)),
+    (re.compile(rf"^{LTCUSD}"), (QUANTO, uBTC * 2)),
+    (re.compile(rf"^{XRPUSD}$"), (QUANTO, uBTC / 20)),
+    # Unknown USD contracts, notional is 0.
+    (re.compile("USD"), (QUANTO, 0)),
+)
 
-def calc_notional(x):
-    if x.symbol == XBTUSD or XBT_FUTURES_REGEX.match(x.symbol):
-        return x.volume / x.price
-    elif x.symbol.startswith(ETHUSD) or x.symbol.startswith(BCHUSD):
-        return x.volume * x.price * uBTC
-    elif x.symbol.startswith(LTCUSD):
-        return x.volume * x.price * uBTC * 2
-    elif x.symbol == XRPUSD:
-        return x.volume * x.price * uBTC / 20
-    elif "USD" in x.symbol:
-        return 0
-    else:
-        return x.volume * x.price
+
+def calc_notional(data_frame):
+    return calc_contract_notional(data_frame, CONTRACTS, default=(LINEAR, 1))
@@ -12,6 +12,8 @@ class BitmexPerpetualETL(BaseBitmexETL):
         date_from=None,
         date_to=None,
         aggregate=False,
+        prefetch=0,
+        backfill=0,
         verbose=False,
     ):
         # Multiple symbols.
@@ -25,12 +27,17 @@ class BitmexPerpetualETL(BaseBitmexETL):
             aggregate=aggregate,
             verbose=verbose,
         )
+        self.prefetch = prefetch
+        self.backfill = backfill
 
     @property
     def log_prefix(self):
         symbols = " ".join(self.symbols)
         return f"{self.exchange_display} {symbols}"
 
+    def get_symbols_filter(self):
+        return self.symbols
+
     def has_data(self, date):
         """Firestore cache for each symbol, all symbols have data."""
         document = date.isoformat()
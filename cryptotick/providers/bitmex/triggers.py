@@ -1,6 +1,6 @@
-import httpx
-
+from ... import httpclient
 from ...utils import date_range, publish
+from .archive import BitmexArchiveETL
 from .futures import BitmexFuturesETL
 from .perpetual import BitmexPerpetualETL
 
@@ -10,7 +10,7 @@ class BitmexPerpetualETLTrigger(BitmexPerpetualETL):
         for date in date_range(self.date_from, self.date_to, reverse=True):
             if not self.has_data(date):
                 url = self.get_url(date)
-                response = httpx.head(url)
+                response = httpclient.head(url)
                 if response.status_code == 200:
                     data = {
                         "symbols": " ".join(self.symbols),
@@ -25,7 +25,7 @@ class BitmexFuturesETLTrigger(BitmexFuturesETL):
         for date in date_range(self.date_from, self.date_to, reverse=True):
             if not self.has_data(date):
                 url = self.get_url(date)
-                response = httpx.head(url)
+                response = httpclient.head(url)
                 if response.status_code == 200:
                     data = {
                         "root_symbol": self.root_symbol,
@@ -33,3 +33,40 @@ class BitmexFuturesETLTrigger(BitmexFuturesETL):
                         "aggregate": self.aggregate,
                     }
                     publish("bitmex-futures", data)
+
+
+class BitmexArchiveETLTrigger(BitmexArchiveETL):
+    def __init__(
+        self,
+        symbols=None,
+        root_symbols=None,
+        date_from=None,
+        date_to=None,
+        aggregate=False,
+        verbose=False,
+    ):
+        self.symbols = symbols or []
+        self.root_symbols = root_symbols or []
+        super().__init__(
+            symbols=self.symbols,
+            root_symbols=self.root_symbols,
+            date_from=date_from,
+            date_to=date_to,
+            aggregate=aggregate,
+            verbose=verbose,
+        )
+
+    def main(self):
+        """One job for all consumers, rather than one job for each."""
+        for date in date_range(self.date_from, self.date_to, reverse=True):
+            if not self.has_data(date):
+                url = self.get_url(date)
+                response = httpclient.head(url)
+                if response.status_code == 200:
+                    data = {
+                        "symbols": " ".join(self.symbols),
+                        "root_symbols": " ".join(self.root_symbols),
+                        "date": date.isoformat(),
+                        "aggregate": self.aggregate,
+                    }
+                    publish("bitmex-archive", data)
@@ -1,17 +1,22 @@
 import datetime
 
-import httpx
 import pandas as pd
 
+from ... import httpclient
 from ...bqloader import get_table_name
 from ...cryptotick import S3CryptoExchangeETL
-from ...s3downloader import calculate_notional
+from ...s3downloader import calc_contract_notional, calculate_notional
+from ...s3downloader.constants import INVERSE
 from ...utils import publish
 from .constants import BYBIT, URL
 
+# Symbol pattern, and contract type and multiplier. First match. All symbols
+# are inverse, i.e. volume / price.
+CONTRACTS = ()
 
-def calc_notional(x):
-    return x["volume"] / x["price"]
+
+def calc_notional(data_frame):
+    return calc_contract_notional(data_frame, CONTRACTS, default=(INVERSE, 1))
 
 
 class BybitPerpetualETL(S3CryptoExchangeETL):
@@ -21,6 +26,8 @@ class BybitPerpetualETL(S3CryptoExchangeETL):
         date_from=None,
         date_to=None,
         aggregate=False,
+        prefetch=0,
+        backfill=0,
         verbose=False,
     ):
         exchange = BYBIT
@@ -34,10 +41,12 @@ class BybitPerpetualETL(S3CryptoExchangeETL):
             aggregate=aggregate,
             verbose=verbose,
         )
+        self.prefetch = prefetch
+        self.backfill = backfill
 
     def get_url(self, date):
         directory = f"{URL}{self.symbol}/"
-        response = httpx.get(directory)
+        response = httpclient.get(directory)
         if response.status_code == 200:
             return f"{URL}{self.symbol}/{self.symbol}{date.isoformat()}.csv.gz"
         else:
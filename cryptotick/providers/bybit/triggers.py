@@ -1,5 +1,4 @@
-import httpx
-
+from ... import httpclient
 from ...utils import date_range, publish
 from .perpetual import BybitPerpetualETL
 
@@ -9,7 +8,7 @@ class BybitPerpetualETLTrigger(BybitPerpetualETL):
         for date in date_range(self.date_from, self.date_to, reverse=True):
             if not self.has_data(date):
                 url = self.get_url(date)
-                response = httpx.head(url)
+                response = httpclient.head(url)
                 if response.status_code == 200:
                     data = {
                         "symbol": self.symbol,
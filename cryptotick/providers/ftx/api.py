@@ -1,6 +1,6 @@
-import httpx
 from ciso8601 import parse_datetime
 
+from ... import httpclient
 from .constants import BTC, MAX_RESULTS, URL
 
 
@@ -20,7 +20,7 @@ def get_expired_futures(root_symbol=BTC, verbose=True):
 
 
 def get_futures(url, root_symbol=BTC, verbose=True):
-    response = httpx.get(url)
+    response = httpclient.get(url)
     data = response.json()
     result = data["result"]
     success = data["success"]
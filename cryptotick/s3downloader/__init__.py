@@ -1,7 +1,10 @@
 from .lib import (
+    calc_contract_notional,
     calculate_index,
     calculate_notional,
     calculate_tick_rule,
+    get_dtype_profile,
+    get_memory_usage,
     row_to_json,
     set_columns,
     set_types,
@@ -14,9 +17,12 @@ __all__ = [
     "utc_timestamp",
     "strip_nanoseconds",
     "calculate_notional",
+    "calc_contract_notional",
     "calculate_tick_rule",
     "calculate_index",
     "set_types",
+    "get_dtype_profile",
+    "get_memory_usage",
     "set_columns",
     "row_to_json",
     "HistoricalDownloader",
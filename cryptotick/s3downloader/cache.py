@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+from tempfile import NamedTemporaryFile
+
+from ..constants import ARCHIVE_CACHE_DIRECTORY, ARCHIVE_CACHE_MAX_SIZE
+
+# 10GB
+MAX_SIZE = 10 * 1024
+
+
+def get_archive_cache():
+    directory = os.environ.get(ARCHIVE_CACHE_DIRECTORY, None)
+    if directory:
+        max_size = int(os.environ.get(ARCHIVE_CACHE_MAX_SIZE, None) or MAX_SIZE)
+        return ArchiveCache(directory, max_size=max_size)
+
+
+class ArchiveCache:
+    """
+    Local cache of downloaded archives, keyed by URL. ETag, and Last-Modified,
+    are saved for revalidation with a conditional GET. Least recently used
+    archives are evicted, when total size exceeds max size, in MB.
+    """
+
+    def __init__(self, directory, max_size=MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size * 1024 * 1024
+        os.makedirs(directory, exist_ok=True)
+
+    def get_key(self, url):
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def get_filename(self, url):
+        return os.path.join(self.directory, f"{self.get_key(url)}.gz")
+
+    def get_metadata_filename(self, url):
+        return os.path.join(self.directory, f"{self.get_key(url)}.json")
+
+    def get_metadata(self, url):
+        filename = self.get_metadata_filename(url)
+        if os.path.exists(filename) and os.path.exists(self.get_filename(url)):
+            with open(filename) as f:
+                return json.load(f)
+
+    def touch(self, filename):
+        """Most recently used, unless already evicted."""
+        try:
+            os.utime(filename)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def get(self, url):
+        """Cached filename, which is now most recently used."""
+        if self.get_metadata(url):
+            filename = self.get_filename(url)
+            if self.touch(filename):
+                return filename
+
+    def get_headers(self, url):
+        """
+        Conditional GET headers. Archive is now most recently used, so it is
+        not evicted first while it is revalidated.
+        """
+        headers = {}
+        metadata = self.get_metadata(url)
+        if metadata and self.touch(self.get_filename(url)):
+            if metadata["etag"]:
+                headers["If-None-Match"] = metadata["etag"]
+            if metadata["last_modified"]:
+                headers["If-Modified-Since"] = metadata["last_modified"]
+        return headers
+
+    def set(self, url, chunks, headers):
+        with NamedTemporaryFile(dir=self.directory, delete=False) as temp:
+            try:
+                for chunk in chunks:
+                    temp.write(chunk)
+            except BaseException:
+                os.remove(temp.name)
+                raise
+        return self.commit(url, temp.name, headers)
+
+    def iter_set(self, url, chunks, headers):
+        """Write chunks to cache, as they are iterated."""
+        temp = NamedTemporaryFile(dir=self.directory, delete=False)
+        try:
+            with temp:
+                for chunk in chunks:
+                    temp.write(chunk)
+                    yield chunk
+        except BaseException:
+            os.remove(temp.name)
+            raise
+        else:
+            self.commit(url, temp.name, headers)
+
+    def commit(self, url, temp_filename, headers):
+        filename = self.get_filename(url)
+        os.replace(temp_filename, filename)
+        metadata = {
+            "url": url,
+            "etag": headers.get("ETag", None),
+            "last_modified": headers.get("Last-Modified", None),
+            "size": os.path.getsize(filename),
+        }
+        with open(self.get_metadata_filename(url), "w") as f:
+            json.dump(metadata, f)
+        self.evict(exclude=filename)
+        return filename
+
+    def evict(self, exclude=None):
+        archives = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".gz"):
+                filename = os.path.join(self.directory, name)
+                stat = os.stat(filename)
+                archives.append((stat.st_mtime, stat.st_size, filename))
+        total = sum([size for _, size, _ in archives])
+        # Least recently used first.
+        for _, size, filename in sorted(archives):
+            if total <= self.max_size:
+                break
+            if filename != exclude:
+                for f in (filename, filename[: -len(".gz")] + ".json"):
+                    if os.path.exists(f):
+                        os.remove(f)
+                total -= size
@@ -0,0 +1,18 @@
+PYARROW = "pyarrow"
+PYTHON = "python"
+
+ENGINES = (PYARROW, PYTHON)
+
+# Dtype profiles.
+STANDARD = "standard"
+COMPACT = "compact"
+
+DTYPE_PROFILES = (STANDARD, COMPACT)
+
+# Categorical, with the compact profile.
+CATEGORIES = ("symbol", "tickDirection")
+
+# Contract types, for notional.
+INVERSE = "inverse"
+QUANTO = "quanto"
+LINEAR = "linear"
@@ -0,0 +1,100 @@
+import re
+import time
+
+import httpx
+
+from .. import httpclient
+from .stream import DOWNLOAD_CHUNK_SIZE
+
+RETRY = 5
+
+CONTENT_RANGE_REGEX = re.compile(r"^bytes (\d+)-\d+/(\d+|\*)$")
+
+
+class ResumeError(EOFError):
+    """Resume is impossible, e.g. file changed, so restart the download."""
+
+
+class ResumableDownload:
+    """
+    Download, which resumes with range requests after a short read, or an
+    error, from the last byte received. Integrity is verified against
+    Content-Length. If the server ignores the range, the transfer is restarted,
+    and bytes already received are skipped. If the file changed, resume is
+    impossible, so ResumeError is raised.
+    """
+
+    def __init__(self, url, headers=None, retry=RETRY):
+        self.url = url
+        self.headers = headers or {}
+        self.retry = retry
+        self.response = None
+        self.start = 0
+        self.offset = 0
+
+    def __enter__(self):
+        self.response = httpclient.open_stream("GET", self.url, headers=self.headers)
+        self.status_code = self.response.status_code
+        self.response_headers = self.response.headers
+        content_length = self.response_headers.get("Content-Length", None)
+        self.content_length = int(content_length) if content_length else None
+        self.etag = self.response_headers.get("ETag", None)
+        self.last_modified = self.response_headers.get("Last-Modified", None)
+        return self
+
+    def __exit__(self, *args):
+        self.response.close()
+
+    def iter_bytes(self, chunk_size=DOWNLOAD_CHUNK_SIZE):
+        assert self.status_code == 200
+        retry = 0
+        while True:
+            try:
+                if retry:
+                    self.resume()
+                position = self.start
+                for chunk in self.response.iter_raw(chunk_size):
+                    stop = position + len(chunk)
+                    # Skip bytes already received, if transfer restarted.
+                    if stop > self.offset:
+                        yield chunk[max(self.offset - position, 0) :]
+                        self.offset = stop
+                    position = stop
+            except httpx.TransportError as exception:
+                error = exception
+            else:
+                if self.content_length is None or self.offset == self.content_length:
+                    return
+                error = EOFError(
+                    f"Short read, {self.offset} of {self.content_length} bytes"
+                )
+            retry += 1
+            if retry > self.retry:
+                raise error
+            print(f"{error}, resuming at {self.offset}: {self.url}")
+            time.sleep(retry)
+
+    def resume(self):
+        self.response.close()
+        headers = {"Range": f"bytes={self.offset}-"}
+        # Only if file is unchanged.
+        validator = self.etag or self.last_modified
+        if validator:
+            headers["If-Range"] = validator
+        response = httpclient.open_stream("GET", self.url, headers=headers)
+        self.response = response
+        if response.status_code == 206:
+            match = CONTENT_RANGE_REGEX.match(response.headers.get("Content-Range", ""))
+            if match and int(match.group(1)) <= self.offset:
+                self.start = int(match.group(1))
+                return
+        elif response.status_code == 200 and self.is_unchanged(response):
+            # Range is not supported, so restart.
+            self.start = 0
+            return
+        raise ResumeError(f"Cannot resume, {response.status_code}: {self.url}")
+
+    def is_unchanged(self, response):
+        etag = response.headers.get("ETag", None)
+        last_modified = response.headers.get("Last-Modified", None)
+        return etag == self.etag and last_modified == self.last_modified
@@ -0,0 +1,276 @@
+import gzip
+import io
+import zlib
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv
+
+from .constants import ENGINES, PYARROW, PYTHON
+
+# Arrow type inference is per block, when streaming.
+COLUMN_TYPES = {"price": pa.float64(), "size": pa.float64()}
+
+
+def parse_engine(engine):
+    assert engine in ENGINES
+    return engine
+
+
+def read_csv(
+    filename,
+    columns,
+    engine=PYARROW,
+    timestamp_format=None,
+    symbols=None,
+    categories=(),
+    is_truncated=False,
+):
+    if engine == PYARROW:
+        # Arrow decompresses natively, as a stream. A Python stream that raises
+        # EOFError may deadlock Arrow's reader threads.
+        if is_truncated:
+            source = pa.BufferReader(decompress(filename, is_truncated=True))
+        else:
+            source = pa.input_stream(filename, compression="gzip")
+        return read_csv_pyarrow(
+            source,
+            columns,
+            timestamp_format=timestamp_format,
+            symbols=symbols,
+            categories=categories,
+        )
+    elif engine == PYTHON:
+        if is_truncated:
+            source = io.BytesIO(decompress(filename, is_truncated=True))
+        else:
+            source = gzip.open(filename)
+        with source:
+            return read_csv_python(
+                source,
+                columns,
+                timestamp_format=timestamp_format,
+                symbols=symbols,
+                categories=categories,
+            )
+    else:
+        raise NotImplementedError
+
+
+def decompress(filename, is_truncated=False):
+    """
+    In memory, so only if truncated. Decompress until the last complete line.
+    """
+    with open(filename, "rb") as f:
+        compressed = f.read()
+    data = []
+    # Maybe concatenated gzip members.
+    while compressed:
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        data.append(decompressor.decompress(compressed))
+        if not decompressor.eof:
+            if is_truncated:
+                data[-1] = data[-1][: data[-1].rfind(b"\n") + 1]
+                break
+            raise EOFError("Compressed file ended before the end-of-stream marker")
+        compressed = decompressor.unused_data
+    return b"".join(data)
+
+
+def iter_csv(
+    stream,
+    columns,
+    chunksize,
+    engine=PYARROW,
+    timestamp_format=None,
+    symbols=None,
+    categories=(),
+):
+    """Index is continuous, as if the file was read at once."""
+    if engine == PYARROW:
+        return iter_csv_pyarrow(
+            stream,
+            columns,
+            chunksize,
+            timestamp_format=timestamp_format,
+            symbols=symbols,
+            categories=categories,
+        )
+    elif engine == PYTHON:
+        return iter_csv_python(
+            stream,
+            columns,
+            chunksize,
+            timestamp_format=timestamp_format,
+            symbols=symbols,
+            categories=categories,
+        )
+    else:
+        raise NotImplementedError
+
+
+def read_csv_pyarrow(
+    source, columns, timestamp_format=None, symbols=None, categories=()
+):
+    try:
+        table = csv.read_csv(
+            source,
+            read_options=csv.ReadOptions(use_threads=True),
+            convert_options=get_convert_options(columns, symbols, categories),
+        )
+    except OSError as exception:
+        # As gzip, so the archive may be read until truncated.
+        if "Truncated" in str(exception):
+            raise EOFError(str(exception))
+        raise
+    finally:
+        source.close()
+    return table_to_data_frame(table, timestamp_format, symbols, categories)
+
+
+def iter_csv_pyarrow(
+    stream, columns, chunksize, timestamp_format=None, symbols=None, categories=()
+):
+    # Block size is bytes, not rows. Assume about 100 bytes per row.
+    block_size = max(chunksize * 100, 1 << 20)
+    try:
+        reader = csv.open_csv(
+            stream,
+            read_options=csv.ReadOptions(block_size=block_size),
+            convert_options=get_convert_options(columns, symbols, categories),
+        )
+    except pa.ArrowInvalid as exception:
+        # Empty CSV file
+        if "Empty CSV file" in str(exception):
+            return
+        raise
+    start = 0
+    for batch in reader:
+        table = pa.Table.from_batches([batch])
+        yield table_to_data_frame(
+            table, timestamp_format, symbols, categories, start=start
+        )
+        start += batch.num_rows
+
+
+def get_convert_options(columns, symbols=None, categories=()):
+    column_types = {key: value for key, value in COLUMN_TYPES.items() if key in columns}
+    # Symbols are compared once per dictionary, not once per row.
+    dictionaries = set(categories) | ({"symbol"} if symbols else set())
+    for column in dictionaries:
+        if column in columns:
+            column_types[column] = pa.dictionary(pa.int32(), pa.string())
+    return csv.ConvertOptions(include_columns=list(columns), column_types=column_types)
+
+
+def filter_symbols(table, symbols, decode=True):
+    """Filter dictionary encoded symbols, and maybe decode the remaining rows."""
+    value_set = pa.array(symbols, type=pa.string())
+    column = table.column("symbol")
+    masks = []
+    for chunk in column.chunks:
+        if not pa.types.is_dictionary(chunk.type):
+            chunk = chunk.dictionary_encode()
+        is_in = pc.is_in(chunk.dictionary, value_set=value_set)
+        mask = pc.take(is_in, chunk.indices).to_numpy(zero_copy_only=False)
+        masks.append(mask)
+    mask = np.concatenate(masks) if masks else np.zeros(0, dtype=bool)
+    table = table.filter(pa.array(mask, type=pa.bool_()))
+    column = table.column("symbol")
+    if decode and pa.types.is_dictionary(column.type):
+        chunks = [chunk.dictionary_decode() for chunk in column.chunks]
+        column = pa.chunked_array(chunks, type=pa.string())
+        index = table.column_names.index("symbol")
+        table = table.set_column(index, "symbol", column)
+    # Row numbers, in the file.
+    return table, np.flatnonzero(mask)
+
+
+def table_to_data_frame(
+    table, timestamp_format=None, symbols=None, categories=(), start=0
+):
+    """Dictionary encoded columns are categorical."""
+    positions = None
+    if symbols:
+        decode = "symbol" not in categories
+        table, positions = filter_symbols(table, symbols, decode=decode)
+    if timestamp_format and "timestamp" in table.column_names:
+        index = table.column_names.index("timestamp")
+        timestamp = parse_timestamp(table.column(index), timestamp_format)
+        table = table.set_column(index, "timestamp", timestamp)
+    data_frame = table.to_pandas()
+    # Compute function not available, with earlier pyarrow.
+    if "timestamp" in data_frame.columns and data_frame.timestamp.dtype == object:
+        data_frame = parse_timestamp_python(data_frame, timestamp_format)
+    if positions is not None:
+        data_frame.index = pd.Index(positions + start)
+    elif start:
+        data_frame.index = pd.RangeIndex(start, start + len(data_frame))
+    return data_frame
+
+
+def parse_timestamp(array, timestamp_format):
+    """
+    Arrow strptime does not parse fractional seconds. However, ISO 8601 does,
+    to the nanosecond. If the format is ISO 8601, except for the date and time
+    separator, e.g. BitMEX "%Y-%m-%dD%H:%M:%S.%f", replace the separator.
+    """
+    if pa.types.is_timestamp(array.type):
+        return array
+    if "%f" not in timestamp_format:
+        return pc.strptime(array, format=timestamp_format, unit="ns")
+    separator = timestamp_format[8:9] if timestamp_format.startswith("%Y-%m-%d") else ""
+    is_iso_format = timestamp_format == f"%Y-%m-%d{separator}%H:%M:%S.%f"
+    if is_iso_format and hasattr(pc, "replace_substring"):
+        if separator != "T":
+            array = pc.replace_substring(array, separator, "T", max_replacements=1)
+        return array.cast(pa.timestamp("ns"))
+    return array
+
+
+def read_csv_python(
+    source, columns, timestamp_format=None, symbols=None, categories=()
+):
+    data_frame = pd.read_csv(source, usecols=columns, engine="python")
+    data_frame = filter_symbols_python(data_frame, symbols)
+    data_frame = set_categories(data_frame, categories)
+    return parse_timestamp_python(data_frame, timestamp_format)
+
+
+def iter_csv_python(
+    stream, columns, chunksize, timestamp_format=None, symbols=None, categories=()
+):
+    try:
+        reader = pd.read_csv(
+            stream, usecols=columns, engine="python", chunksize=chunksize
+        )
+    except pd.errors.EmptyDataError:
+        return
+    with reader:
+        # Index of chunks is continuous.
+        for data_frame in reader:
+            data_frame = filter_symbols_python(data_frame, symbols)
+            data_frame = set_categories(data_frame, categories)
+            yield parse_timestamp_python(data_frame, timestamp_format)
+
+
+def filter_symbols_python(data_frame, symbols=None):
+    if symbols:
+        return data_frame[data_frame["symbol"].isin(symbols)]
+    return data_frame
+
+
+def set_categories(data_frame, categories=()):
+    columns = [column for column in categories if column in data_frame.columns]
+    if columns:
+        return data_frame.astype({column: "category" for column in columns})
+    return data_frame
+
+
+def parse_timestamp_python(data_frame, timestamp_format=None):
+    if timestamp_format and "timestamp" in data_frame.columns:
+        timestamp = pd.to_datetime(data_frame["timestamp"], format=timestamp_format)
+        data_frame = data_frame.assign(timestamp=timestamp)
+    return data_frame
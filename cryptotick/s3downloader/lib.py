@@ -1,52 +1,81 @@
+import os
 from datetime import timezone
 
 import numpy as np
+import pandas as pd
+
+from ..constants import DTYPE_PROFILE
+from .constants import COMPACT, DTYPE_PROFILES, INVERSE, LINEAR, STANDARD
 
 
 def utc_timestamp(data_frame):
     # Because pyarrow.lib.ArrowInvalid: Casting from timestamp[ns]
     # to timestamp[us, tz=UTC] would lose data.
-    data_frame.timestamp = data_frame.apply(
-        lambda x: x.timestamp.tz_localize(timezone.utc), axis=1
-    )
+    data_frame["timestamp"] = data_frame["timestamp"].dt.tz_localize(timezone.utc)
     return data_frame
 
 
-def strip_nanoseconds(data_frame):
+def strip_nanoseconds(data_frame, profile=STANDARD):
     # Bitmex data is accurate to the nanosecond.
     # However, data is typically only provided to the microsecond.
-    data_frame["nanoseconds"] = data_frame.apply(
-        lambda x: x.timestamp.nanosecond, axis=1
-    )
-    data_frame.timestamp = data_frame.apply(
-        lambda x: x.timestamp.replace(nanosecond=0)
-        if x.nanoseconds > 0
-        else x.timestamp,
-        axis=1,
-    )
+    timestamp = data_frame["timestamp"]
+    # Nanoseconds since epoch, UTC.
+    nanoseconds = timestamp.values.view("int64") % 1000
+    data_frame["nanoseconds"] = nanoseconds.astype(get_int_type(profile, "int16"))
+    data_frame["timestamp"] = timestamp - pd.to_timedelta(nanoseconds, unit="ns")
     return data_frame
 
 
 def calculate_notional(data_frame, func):
-    data_frame["notional"] = data_frame.apply(func, axis=1)
+    """Function of columns, not rows."""
+    data_frame["notional"] = func(data_frame)
     return data_frame
 
 
-def calculate_tick_rule(data_frame):
-    data_frame["tickRule"] = data_frame.apply(
-        lambda x: (1 if x.tickDirection in ("PlusTick", "ZeroPlusTick") else -1),
-        axis=1,
-    )
+def get_contract(symbol, contracts, default=(LINEAR, 1)):
+    """First contract with a pattern that matches the symbol."""
+    for regex, contract in contracts:
+        if regex.search(symbol):
+            return contract
+    return default
+
+
+def calc_contract_notional(data_frame, contracts, default=(LINEAR, 1)):
+    """
+    Contract type, and multiplier, of each unique symbol. Inverse notional is
+    volume * multiplier / price. Quanto, and linear, is volume * price * multiplier.
+    """
+    codes, symbols = pd.factorize(data_frame["symbol"])
+    specs = [get_contract(symbol, contracts, default) for symbol in symbols]
+    is_inverse = np.array([c == INVERSE for c, _ in specs], dtype=bool)[codes]
+    multiplier = np.array([m for _, m in specs], dtype="float64")[codes]
+    volume = data_frame["volume"].values
+    price = data_frame["price"].values
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inverse = volume * multiplier / price
+    return np.where(is_inverse, inverse, volume * price * multiplier)
+
+
+def calculate_tick_rule(data_frame, profile=STANDARD):
+    is_plus_tick = data_frame["tickDirection"].isin(("PlusTick", "ZeroPlusTick"))
+    tick_rule = np.where(is_plus_tick, 1, -1)
+    data_frame["tickRule"] = tick_rule.astype(get_int_type(profile, "int8"))
     return data_frame
 
 
-def calculate_index(data_frame):
-    symbols = data_frame.symbol.unique()
-    data_frame["index"] = np.nan  # B/C pandas index
-    for symbol in symbols:
-        index = data_frame.index[data_frame.symbol == symbol]
-        # 0-based index according to symbol
-        data_frame.loc[index, "index"] = index.values - index.values[0]
+def calculate_index(data_frame, base=0):
+    """
+    0-based index according to symbol, in order. Base is an int, or a dict of
+    bases by symbol, e.g. the previous day's last index + 1.
+    """
+    codes, symbols = pd.factorize(data_frame["symbol"])
+    index = pd.Series(codes).groupby(codes, sort=False).cumcount().values
+    if isinstance(base, dict):
+        bases = np.array([base.get(symbol, 0) for symbol in symbols], dtype="int64")
+        index = index + bases[codes]
+    else:
+        index = index + base
+    data_frame["index"] = index.astype("int64")
     return data_frame
 
 
@@ -56,15 +85,38 @@ def set_columns(data_frame):
     return data_frame
 
 
-def set_types(data_frame):
-    return data_frame.astype(
-        {
-            "price": "float64",
-            "volume": "float64",
-            "notional": "float64",
-            "index": "int64",
-        }
-    )
+def get_dtype_profile():
+    profile = os.environ.get(DTYPE_PROFILE, None) or STANDARD
+    assert profile in DTYPE_PROFILES
+    return profile
+
+
+def get_int_type(profile, compact_type):
+    """Smaller integers, with the compact profile."""
+    return compact_type if profile == COMPACT else "int64"
+
+
+def set_types(data_frame, profile=STANDARD):
+    types = {
+        "price": "float64",
+        "volume": "float64",
+        "notional": "float64",
+        "index": "int64",
+    }
+    if profile == COMPACT:
+        # Timestamp is nanoseconds since epoch, UTC.
+        if pd.api.types.is_datetime64_any_dtype(data_frame["timestamp"]):
+            timestamp = data_frame["timestamp"].values.view("int64")
+            data_frame = data_frame.assign(timestamp=timestamp)
+        types.update({"tickRule": "int8", "nanoseconds": "int16"})
+        if "symbol" in data_frame.columns:
+            types["symbol"] = "category"
+    return data_frame.astype(types)
+
+
+def get_memory_usage(data_frame):
+    """In MB."""
+    return data_frame.memory_usage(deep=True).sum() / 1024 / 1024
 
 
 def row_to_json(row):
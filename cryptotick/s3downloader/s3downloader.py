@@ -1,55 +1,184 @@
-import gzip
+import io
 import os
 from tempfile import NamedTemporaryFile
 
-import httpx
 import pandas as pd
 
+from .cache import get_archive_cache
+from .constants import CATEGORIES, COMPACT, PYARROW, STANDARD
+from .download import ResumableDownload, ResumeError
+from .engines import iter_csv, parse_engine, read_csv, set_categories
+from .stream import (
+    CHUNKSIZE,
+    DOWNLOAD_CHUNK_SIZE,
+    GzipStream,
+    iter_background,
+    iter_file,
+)
+
+# Downloads restarted from the first byte, if resume is impossible.
+RESTART = 1
+
 
 class HistoricalDownloader:
     def __init__(
-        self, url, columns=("timestamp", "symbol", "size", "tickDirection", "price")
+        self,
+        url,
+        columns=("timestamp", "symbol", "size", "tickDirection", "price"),
+        chunksize=None,
+        engine=PYARROW,
+        timestamp_format=None,
+        symbols=None,
+        dtype_profile=STANDARD,
+        cache=None,
     ):
         self.url = url
         self.columns = columns
+        self.chunksize = chunksize
+        self.engine = parse_engine(engine)
+        self.timestamp_format = timestamp_format
+        # If specified, other symbols are filtered while parsing.
+        self.symbols = symbols
+        # Strings are categorical, with the compact profile.
+        self.categories = CATEGORIES if dtype_profile == COMPACT else ()
+        # If not specified, cache is configured by environment.
+        self.cache = cache or get_archive_cache()
+
+    def get_headers(self, conditional=True):
+        if self.cache and conditional:
+            return self.cache.get_headers(self.url)
+        return {}
+
+    def main(self, restart=RESTART):
+        try:
+            return self._main()
+        except ResumeError as exception:
+            # Partial download is discarded.
+            if not restart:
+                raise
+            print(f"{exception}, restarting")
+            return self.main(restart=restart - 1)
 
-    def main(self):
-        # Streaming downloads with boto3, and httpx gave many EOFErrors.
-        # No problem with regular download.
-        response = httpx.get(self.url)
-        if response.status_code == 200:
-            temp_file = NamedTemporaryFile()
-            filename = temp_file.name
-            with open(filename, "wb+") as temp:
-                temp.write(response.content)
-                size = os.path.getsize(filename)
-                if size > 0:
-                    # Extract
+    def _main(self, conditional=True):
+        if self.chunksize:
+            data_frames = list(self.stream())
+            if data_frames:
+                data_frame = pd.concat(data_frames)
+                # Categories of each chunk may differ.
+                return set_categories(data_frame, self.categories)
+            return
+        # Streaming downloads gave many EOFErrors, so resume with range requests.
+        headers = self.get_headers(conditional)
+        with ResumableDownload(self.url, headers=headers) as download:
+            # Not modified, so cached.
+            if download.status_code == 304:
+                filename = self.cache.get(self.url)
+                if filename:
+                    return self._extract(filename)
+            elif download.status_code == 200:
+                chunks = download.iter_bytes(DOWNLOAD_CHUNK_SIZE)
+                if self.cache:
+                    filename = self.cache.set(
+                        self.url, chunks, download.response_headers
+                    )
                     return self._extract(filename)
                 else:
-                    print(f"No data: {self.url}")
-                    return
-        else:
-            print(f"Error {response.status_code}: {self.url}")
-            return
+                    with NamedTemporaryFile() as temp:
+                        for chunk in chunks:
+                            temp.write(chunk)
+                        temp.flush()
+                        return self._extract(temp.name)
+            else:
+                print(f"Error {download.status_code}: {self.url}")
+                return
+        # Evicted while revalidated, so download again.
+        return self._main(conditional=False)
 
-    def _extract(self, filename):
+    def stream(self, restart=RESTART):
+        """
+        Decompress the response as it is downloaded, and yield data frames
+        of chunksize rows. Memory is bounded by chunksize, not by the day.
+        """
+        has_data = False
         try:
-            data_frame = pd.read_csv(
-                filename, usecols=self.columns, engine="python", compression="gzip",
-            )
-        except EOFError:
-            print(f"EOFError: {filename}")
-            data_frame = self._extract_force(filename)
-        return data_frame
+            for data_frame in self._stream():
+                has_data = True
+                yield data_frame
+        except ResumeError as exception:
+            # Restart, only if no data frames were yielded.
+            if has_data or not restart:
+                raise
+            print(f"{exception}, restarting")
+            yield from self.stream(restart=restart - 1)
+
+    def _stream(self, conditional=True):
+        chunksize = self.chunksize or CHUNKSIZE
+        headers = self.get_headers(conditional)
+        with ResumableDownload(self.url, headers=headers) as download:
+            # Not modified, so cached.
+            if download.status_code == 304:
+                filename = self.cache.get(self.url)
+                chunks = iter_file(filename, DOWNLOAD_CHUNK_SIZE) if filename else None
+            elif download.status_code == 200:
+                chunks = download.iter_bytes(DOWNLOAD_CHUNK_SIZE)
+                if self.cache:
+                    chunks = self.cache.iter_set(
+                        self.url, chunks, download.response_headers
+                    )
+            else:
+                print(f"Error {download.status_code}: {self.url}")
+                return
+            if chunks:
+                # Download in a thread, while parsing.
+                chunks = iter_background(chunks)
+                try:
+                    stream = io.BufferedReader(GzipStream(chunks))
+                    yield from self._extract_chunks(stream, chunksize)
+                finally:
+                    chunks.close()
+                return
+        # Evicted while revalidated, so download again.
+        yield from self._stream(conditional=False)
+
+    def _extract_chunks(self, stream, chunksize):
+        has_data = False
+        for data_frame in iter_csv(
+            stream,
+            self.columns,
+            chunksize,
+            engine=self.engine,
+            timestamp_format=self.timestamp_format,
+            symbols=self.symbols,
+            categories=self.categories,
+        ):
+            has_data = True
+            yield data_frame
+        if not has_data:
+            print(f"No data: {self.url}")
 
-    def _extract_force(self, filename):
-        lines = []
+    def _extract(self, filename):
+        if os.path.getsize(filename) == 0:
+            print(f"No data: {self.url}")
+            return
         try:
-            with gzip.open(filename, "rt") as f:
-                for line in f:
-                    lines.append(line)
+            data_frame = read_csv(
+                filename,
+                self.columns,
+                engine=self.engine,
+                timestamp_format=self.timestamp_format,
+                symbols=self.symbols,
+                categories=self.categories,
+            )
         except EOFError:
-            data = [line.strip().split(",") for line in lines]
-            data_frame = pd.DataFrame(data[1:], columns=data[0])
+            # Download is verified, so archive is truncated at source.
+            print(f"EOFError: {self.url}")
+            data_frame = read_csv(
+                filename,
+                self.columns,
+                engine=self.engine,
+                timestamp_format=self.timestamp_format,
+                symbols=self.symbols,
+                categories=self.categories,
+                is_truncated=True,
+            )
         return data_frame
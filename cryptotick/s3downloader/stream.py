@@ -0,0 +1,110 @@
+import io
+import queue
+import threading
+import zlib
+
+# 1MB compressed chunks from the response.
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Rows per data frame.
+CHUNKSIZE = 1000000
+# Compressed chunks buffered ahead of the parser.
+MAX_BUFFERED_CHUNKS = 16
+
+
+class GzipStream(io.RawIOBase):
+    """File-like object, decompresses gzip data as it is read."""
+
+    def __init__(self, iterator):
+        self.iterator = iterator
+        self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self.buffer = b""
+        self.offset = 0
+        self.has_data = False
+        self.is_eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while self.offset == len(self.buffer):
+            if self.is_eof:
+                return 0
+            self.buffer = self._decompress()
+            self.offset = 0
+        size = min(len(b), len(self.buffer) - self.offset)
+        b[:size] = self.buffer[self.offset : self.offset + size]
+        self.offset += size
+        return size
+
+    def _decompress(self):
+        try:
+            chunk = next(self.iterator)
+        except StopIteration:
+            self.is_eof = True
+            data = self.decompressor.flush()
+            # Maybe empty response.
+            if self.has_data and not self.decompressor.eof:
+                raise EOFError("Compressed file ended before the end-of-stream marker")
+            return data
+        self.has_data = True
+        data = self.decompressor.decompress(chunk)
+        # Concatenated gzip members.
+        while self.decompressor.eof and self.decompressor.unused_data:
+            unused_data = self.decompressor.unused_data
+            self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            data += self.decompressor.decompress(unused_data)
+        return data
+
+
+def iter_file(filename, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    with open(filename, "rb") as f:
+        chunk = f.read(chunk_size)
+        while chunk:
+            yield chunk
+            chunk = f.read(chunk_size)
+
+
+def iter_background(iterator, maxsize=MAX_BUFFERED_CHUNKS):
+    """Consume iterator in a thread, so download and parse overlap."""
+    q = queue.Queue(maxsize=maxsize)
+    sentinel = object()
+    stop = threading.Event()
+
+    def put(item):
+        # Consumer may stop early.
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            else:
+                return True
+        return False
+
+    def producer():
+        try:
+            for item in iterator:
+                if not put(item):
+                    break
+            else:
+                put(sentinel)
+        except Exception as exception:
+            put(exception)
+        finally:
+            # Maybe generator.
+            if hasattr(iterator, "close"):
+                iterator.close()
+
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = q.get()
+            if item is sentinel:
+                break
+            elif isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
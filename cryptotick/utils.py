@@ -2,6 +2,7 @@ import base64
 import datetime
 import json
 import os
+import resource
 from pathlib import Path
 
 import pandas as pd
@@ -64,6 +65,11 @@ def is_local():
     return all([os.environ.get(key, None) for key in GCP_APPLICATION_CREDENTIALS])
 
 
+def get_peak_memory_usage():
+    """Maximum resident set size of the process, in MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
 def get_container_name(hostname="asia.gcr.io", image="crypto-exchange-etl"):
     project_id = os.environ[PROJECT_ID]
     return f"{hostname}/{project_id}/{image}"
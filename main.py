@@ -2,6 +2,8 @@ from ciso8601 import parse_datetime
 
 from cryptotick.aggregators import TradeAggregator
 from cryptotick.providers.bitmex import (
+    BitmexArchiveETL,
+    BitmexArchiveETLTrigger,
     BitmexFuturesETL,
     BitmexFuturesETLTrigger,
     BitmexPerpetualETL,
@@ -72,6 +74,38 @@ def bitmex_perpetual(event, context):
         ).main()
 
 
+def bitmex_archive_trigger(event, context):
+    data = base64_decode_event(event)
+    date = data.get("date", get_delta(days=-1).isoformat())
+    symbols = [s for s in data.get("symbols", "").split(" ") if s]
+    root_symbols = [s for s in data.get("root_symbols", "").split(" ") if s]
+    aggregate = data.get("aggregate", True)
+    if symbols or root_symbols:
+        BitmexArchiveETLTrigger(
+            symbols=symbols,
+            root_symbols=root_symbols,
+            date_from=date,
+            date_to=date,
+            aggregate=aggregate,
+        ).main()
+
+
+def bitmex_archive(event, context):
+    data = base64_decode_event(event)
+    symbols = [s for s in data.get("symbols", "").split(" ") if s]
+    root_symbols = [s for s in data.get("root_symbols", "").split(" ") if s]
+    date = data.get("date", get_delta(days=-1).isoformat())
+    aggregate = data.get("aggregate", True)
+    if symbols or root_symbols:
+        BitmexArchiveETL(
+            symbols=symbols,
+            root_symbols=root_symbols,
+            date_from=date,
+            date_to=date,
+            aggregate=aggregate,
+        ).main()
+
+
 def bybit_trigger(event, context):
     data = base64_decode_event(event)
     date = data.get("date", get_delta(days=-1).isoformat())
@@ -29,6 +29,7 @@ def adaptive_threshold_aggregator(
     date_from: str = None,
     date_to: str = None,
     has_multiple_symbols: bool = False,
+    backfill: int = 0,
     verbose: bool = False,
 ):
     set_environment()
@@ -53,6 +54,7 @@ def adaptive_threshold_aggregator(
         date_from=date_from,
         date_to=date_to,
         has_multiple_symbols=has_multiple_symbols,
+        backfill=backfill,
         verbose=verbose,
     ).main()
 
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+# isort:skip_file
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import typer
+
+import pathfix  # noqa: F401
+from cryptotick.aggregators.threshold.lib import aggregate_threshold
+from cryptotick.bqloader import SINGLE_SYMBOL_BAR_SCHEMA, stringify_datetime_types
+from cryptotick.bqloader.staging import to_arrow_table, to_parquet
+from cryptotick.fscache import firestore_data
+
+
+def generate_data_frame(rows):
+    start = pd.Timestamp("2021-01-01", tz="UTC")
+    seconds = np.sort(np.random.randint(0, 86400, size=rows))
+    tick_rule = np.random.choice((1, -1), size=rows)
+    volume = np.random.randint(1, 10000, size=rows)
+    return pd.DataFrame(
+        {
+            "timestamp": start + pd.to_timedelta(seconds, unit="s"),
+            "nanoseconds": 0,
+            "price": np.round(30000 + np.random.random(rows) * 1000, 1),
+            "slippage": 0.0,
+            "volume": volume,
+            "notional": volume / 30000,
+            "tickRule": tick_rule,
+            "exponent": 0,
+        }
+    )
+
+
+def get_bars(rows, thresh_value, top_n):
+    data_frame = generate_data_frame(rows)
+    cache = {"volume": 0, "target": thresh_value}
+    data, _ = aggregate_threshold(data_frame, cache, "volume", top_n=top_n)
+    # As BaseThresholdAggregator.process_data_frame
+    for index, d in enumerate(data):
+        data[index] = stringify_datetime_types(firestore_data(d, strip_date=False))
+        data[index]["topN"] = [
+            stringify_datetime_types(firestore_data(t)) for t in d["topN"]
+        ]
+        data[index]["index"] = index
+    return data
+
+
+def benchmark_bigquery_staging(
+    rows: int = 1000000, thresh_value: int = 1000000, top_n: int = 10
+):
+    """Convert, and serialize, bars without loading. Loads require BigQuery."""
+    data = get_bars(rows, thresh_value, top_n)
+    print(f"Bars: {len(data)}")
+    start = time.time()
+    # As load_table_from_json
+    size = len("\n".join(json.dumps(d) for d in data).encode())
+    print(f"JSON: {time.time() - start:.2f}s, {size / 1e6:.2f}MB")
+    start = time.time()
+    parquet = to_parquet(to_arrow_table(data, SINGLE_SYMBOL_BAR_SCHEMA))
+    size = parquet.getbuffer().nbytes
+    print(f"Parquet: {time.time() - start:.2f}s, {size / 1e6:.2f}MB")
+
+
+if __name__ == "__main__":
+    typer.run(benchmark_bigquery_staging)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+# isort:skip_file
+import datetime
+import gzip
+import os
+import time
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pandas as pd
+import typer
+
+import pathfix  # noqa: F401
+from cryptotick.providers.bitmex.constants import TIMESTAMP_FORMAT
+from cryptotick.s3downloader.constants import ENGINES
+from cryptotick.s3downloader.engines import read_csv
+
+COLUMNS = ("timestamp", "symbol", "size", "tickDirection", "price")
+
+
+def generate_csv(filename, rows):
+    """Generate a BitMEX daily trade file."""
+    start = datetime.datetime(2021, 1, 1)
+    nanoseconds = np.sort(np.random.randint(0, 86400 * 10**9, size=rows))
+    timestamps = pd.Series(pd.to_datetime(start) + pd.to_timedelta(nanoseconds))
+    # Nanosecond precision.
+    nanosecond = pd.Series(nanoseconds % 1000).astype(str).str.zfill(3)
+    data_frame = pd.DataFrame(
+        {
+            "timestamp": timestamps.dt.strftime("%Y-%m-%dD%H:%M:%S.%f") + nanosecond,
+            "symbol": np.random.choice(["XBTUSD", "ETHUSD", "XBTH21"], size=rows),
+            "side": np.random.choice(["Buy", "Sell"], size=rows),
+            "size": np.random.randint(1, 100000, size=rows),
+            "price": np.round(30000 + np.random.random(rows) * 1000, 1),
+            "tickDirection": np.random.choice(
+                ["PlusTick", "ZeroPlusTick", "MinusTick", "ZeroMinusTick"], size=rows
+            ),
+            "trdMatchID": "00000000-0000-0000-0000-000000000000",
+            "grossValue": np.random.randint(1, 10**8, size=rows),
+            "homeNotional": np.random.random(rows),
+            "foreignNotional": np.random.random(rows) * 1000,
+        }
+    )
+    with gzip.open(filename, "wt") as f:
+        data_frame.to_csv(f, index=False)
+
+
+def benchmark_csv_engines(rows: int = 5000000, repeat: int = 1):
+    with TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "trades.csv.gz")
+        start = time.time()
+        generate_csv(filename, rows)
+        elapsed = time.time() - start
+        size = os.path.getsize(filename) / 1024 / 1024
+        print(f"Generated {rows} rows, {size:.1f}MB in {elapsed:.1f}s")
+        for engine in ENGINES:
+            timings = []
+            for i in range(repeat):
+                start = time.time()
+                data_frame = read_csv(
+                    filename, COLUMNS, engine=engine, timestamp_format=TIMESTAMP_FORMAT
+                )
+                timings.append(time.time() - start)
+                assert len(data_frame) == rows
+            elapsed = min(timings)
+            rows_per_second = rows / elapsed
+            print(f"{engine}: {elapsed:.2f}s, {rows_per_second:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    typer.run(benchmark_csv_engines)
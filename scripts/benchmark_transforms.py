@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+
+# isort:skip_file
+import datetime
+import time
+from datetime import timezone
+
+import numpy as np
+import pandas as pd
+import typer
+
+import pathfix  # noqa: F401
+from cryptotick.providers.bitmex.constants import (
+    BCHUSD,
+    ETHUSD,
+    LTCUSD,
+    XBTUSD,
+    XRPUSD,
+    uBTC,
+)
+from cryptotick.providers.bitmex.lib import XBT_FUTURES_REGEX, calc_notional
+from cryptotick.s3downloader import (
+    calculate_notional,
+    calculate_tick_rule,
+    strip_nanoseconds,
+    utc_timestamp,
+)
+
+# Row-wise, as before.
+
+
+def apply_utc_timestamp(data_frame):
+    data_frame.timestamp = data_frame.apply(
+        lambda x: x.timestamp.tz_localize(timezone.utc), axis=1
+    )
+    return data_frame
+
+
+def apply_strip_nanoseconds(data_frame):
+    data_frame["nanoseconds"] = data_frame.apply(
+        lambda x: x.timestamp.nanosecond, axis=1
+    )
+    data_frame.timestamp = data_frame.apply(
+        lambda x: (
+            x.timestamp.replace(nanosecond=0) if x.nanoseconds > 0 else x.timestamp
+        ),
+        axis=1,
+    )
+    return data_frame
+
+
+def apply_tick_rule(data_frame):
+    data_frame["tickRule"] = data_frame.apply(
+        lambda x: (1 if x.tickDirection in ("PlusTick", "ZeroPlusTick") else -1),
+        axis=1,
+    )
+    return data_frame
+
+
+def calc_notional_row(x):
+    if x.symbol == XBTUSD or XBT_FUTURES_REGEX.match(x.symbol):
+        return x.volume / x.price
+    elif x.symbol.startswith(ETHUSD) or x.symbol.startswith(BCHUSD):
+        return x.volume * x.price * uBTC
+    elif x.symbol.startswith(LTCUSD):
+        return x.volume * x.price * uBTC * 2
+    elif x.symbol == XRPUSD:
+        return x.volume * x.price * uBTC / 20
+    elif "USD" in x.symbol:
+        return 0
+    else:
+        return x.volume * x.price
+
+
+def apply_notional(data_frame):
+    data_frame["notional"] = data_frame.apply(calc_notional_row, axis=1)
+    return data_frame
+
+
+def generate_data_frame(rows):
+    start = datetime.datetime(2021, 1, 1)
+    nanoseconds = np.sort(np.random.randint(0, 86400 * 10**9, size=rows))
+    return pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(start) + pd.to_timedelta(nanoseconds),
+            "symbol": np.random.choice(["XBTUSD", "ETHUSD", "XBTH21"], size=rows),
+            "volume": np.random.randint(1, 100000, size=rows).astype(float),
+            "price": np.round(30000 + np.random.random(rows) * 1000, 1),
+            "tickDirection": np.random.choice(
+                ["PlusTick", "ZeroPlusTick", "MinusTick", "ZeroMinusTick"], size=rows
+            ),
+        }
+    )
+
+
+def benchmark(name, func, data_frame, rows):
+    start = time.time()
+    data_frame = func(data_frame)
+    elapsed = time.time() - start
+    rows_per_second = rows / elapsed if elapsed else float("inf")
+    print(f"{name}: {elapsed:.2f}s, {rows_per_second:,.0f} rows/s")
+    return data_frame
+
+
+def benchmark_transforms(rows: int = 100000, row_wise: bool = True):
+    data_frame = generate_data_frame(rows)
+    transforms = (
+        ("utc_timestamp", utc_timestamp, apply_utc_timestamp),
+        ("strip_nanoseconds", strip_nanoseconds, apply_strip_nanoseconds),
+        ("calculate_tick_rule", calculate_tick_rule, apply_tick_rule),
+        (
+            "calculate_notional",
+            lambda df: calculate_notional(df, calc_notional),
+            apply_notional,
+        ),
+    )
+    vectorized = data_frame.copy()
+    for name, func, apply_func in transforms:
+        vectorized = benchmark(name, func, vectorized, rows)
+        if row_wise:
+            data_frame = benchmark(f"{name} (row-wise)", apply_func, data_frame, rows)
+    if row_wise:
+        pd.testing.assert_frame_equal(vectorized, data_frame)
+
+
+if __name__ == "__main__":
+    typer.run(benchmark_transforms)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+
+# isort:skip_file
+import typer
+
+import pathfix  # noqa: F401
+from cryptotick.providers.bitmex import XBT, XBTUSD, BitmexArchiveETL
+from cryptotick.utils import set_environment
+
+
+def bitmex_archive(
+    symbols: str = XBTUSD,
+    root_symbols: str = XBT,
+    date_from: str = None,
+    date_to: str = None,
+    aggregate: bool = False,
+    prefetch: int = 0,
+    backfill: int = 0,
+    verbose: bool = False,
+):
+    set_environment()
+    symbols = [s for s in symbols.split(" ") if s]
+    root_symbols = [s for s in root_symbols.split(" ") if s]
+    BitmexArchiveETL(
+        symbols=symbols,
+        root_symbols=root_symbols,
+        date_from=date_from,
+        date_to=date_to,
+        aggregate=aggregate,
+        prefetch=prefetch,
+        backfill=backfill,
+        verbose=verbose,
+    ).main()
+
+
+if __name__ == "__main__":
+    typer.run(bitmex_archive)
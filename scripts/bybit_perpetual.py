@@ -13,6 +13,8 @@ def bybit_perpetual(
     date_from: str = None,
     date_to: str = None,
     aggregate: bool = False,
+    prefetch: int = 0,
+    backfill: int = 0,
     verbose: bool = False,
 ):
     set_environment()
@@ -21,7 +23,9 @@ def bybit_perpetual(
         date_from=date_from,
         date_to=date_to,
         aggregate=aggregate,
-        verbose=verbose
+        prefetch=prefetch,
+        backfill=backfill,
+        verbose=verbose,
     ).main()
 
 
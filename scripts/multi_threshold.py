@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+
+# isort:skip_file
+import typer
+
+import pathfix  # noqa: F401
+from cryptotick.aggregators import MultiThresholdAggregator
+from cryptotick.utils import set_environment
+
+
+def multi_threshold_aggregator(
+    source_table: str = None,
+    thresholds: str = None,
+    symbol: str = None,
+    min_slippage: float = None,
+    max_slippage: float = None,
+    min_volume: float = None,
+    max_volume: float = None,
+    min_notional: float = None,
+    max_notional: float = None,
+    min_exponent: int = None,
+    max_exponent: int = None,
+    tick_rule: int = None,
+    top_n: int = 10,
+    date_from: str = None,
+    date_to: str = None,
+    has_multiple_symbols: bool = False,
+    backfill: int = 0,
+    verbose: bool = False,
+):
+    set_environment()
+    # Space separated destination_table:thresh_attr:thresh_value
+    thresholds = [t.split(":") for t in thresholds.split(" ") if t]
+    MultiThresholdAggregator(
+        source_table,
+        thresholds,
+        symbol=symbol,
+        min_slippage=min_slippage,
+        max_slippage=max_slippage,
+        min_volume=min_volume,
+        max_volume=max_volume,
+        min_notional=min_notional,
+        max_notional=max_notional,
+        min_exponent=min_exponent,
+        max_exponent=max_exponent,
+        tick_rule=tick_rule,
+        top_n=top_n,
+        date_from=date_from,
+        date_to=date_to,
+        has_multiple_symbols=has_multiple_symbols,
+        backfill=backfill,
+        verbose=verbose,
+    ).main()
+
+
+if __name__ == "__main__":
+    typer.run(multi_threshold_aggregator)
@@ -27,6 +27,7 @@ def threshold_aggregator(
     date_from: str = None,
     date_to: str = None,
     has_multiple_symbols: bool = False,
+    backfill: int = 0,
     verbose: bool = False,
 ):
     set_environment()
@@ -49,6 +50,7 @@ def threshold_aggregator(
         date_from=date_from,
         date_to=date_to,
         has_multiple_symbols=has_multiple_symbols,
+        backfill=backfill,
         verbose=verbose,
     ).main()
 
@@ -1,10 +1,39 @@
 import datetime
+import math
 import random
+from copy import deepcopy
+from operator import itemgetter
 
+import cryptotick.aggregators.base
+import cryptotick.aggregators.threshold.base
+import numpy as np
 import pandas as pd
-from cryptotick.aggregators.trades.lib import aggregate_trades
+from cryptotick.aggregators.adaptivethreshold.constants import EMA, SMA
+from cryptotick.aggregators.adaptivethreshold.lib import (
+    get_initial_adaptive_threshold_cache,
+    update_adaptive_cache_window,
+)
+from cryptotick.aggregators.lib import (
+    aggregate_rows,
+    get_bar_statistics,
+    get_next_cache,
+    merge_cache,
+)
+from cryptotick.aggregators.threshold import (
+    MultiThresholdAggregator,
+    ThresholdAggregator,
+)
+from cryptotick.aggregators.threshold.lib import (
+    DERIVED_COLUMNS,
+    aggregate_threshold,
+    get_initial_threshold_cache,
+    preprocess_data_frame,
+)
+from cryptotick.aggregators.topn import TOP_N_COLUMNS, TopN
+from cryptotick.aggregators.trades.lib import aggregate_trades, calc_exponent
+from cryptotick.constants import BIGQUERY_DATASET
 
-from .utils import get_trade
+from .utils import FirestoreCache, get_trade
 
 
 def get_trades(ticks, is_equal_timestamp=False, nanoseconds=None, symbol=None):
@@ -146,3 +175,405 @@ def test_exponent():
     for row in df.itertuples():
         index = row.Index
         assert row.exponent == index + 1
+
+
+def reference_aggregate_trades(data_frame, has_multiple_symbols=False):
+    """One sample for each run of equal symbol, timestamp, nanoseconds and tick."""
+    columns = ["timestamp", "nanoseconds", "tickRule"]
+    if has_multiple_symbols:
+        columns.insert(0, "symbol")
+    runs = []
+    previous = None
+    for index, row in enumerate(data_frame[columns].itertuples(index=False)):
+        if row != previous:
+            runs.append([])
+        runs[-1].append(index)
+        previous = row
+    samples = []
+    for run in runs:
+        df = data_frame.iloc[run]
+        last_row = df.iloc[-1]
+        volume = df.volume.sum()
+        notional = df.notional.sum()
+        slippage = 0.0
+        if len(df.price.unique()) > 1:
+            vwap = volume / notional
+            slippage = abs(df.price.iloc[0] * notional - vwap * notional)
+        sample = {
+            "date": last_row.timestamp.date(),
+            "timestamp": last_row.timestamp,
+            "nanoseconds": last_row.nanoseconds,
+            "price": last_row.price,
+            "slippage": round(slippage, 6),
+            "volume": volume,
+            "notional": notional,
+            "tickRule": last_row.tickRule,
+        }
+        if has_multiple_symbols:
+            sample["symbol"] = last_row.symbol
+        samples.append(sample)
+    return pd.DataFrame(samples)
+
+
+def test_aggregate_trades_parity():
+    trades = []
+    for symbol in ("A", "B"):
+        for _ in range(10):
+            ticks = [random.choice((1, -1)) for _ in range(random.randint(1, 5))]
+            trades += get_trades(
+                ticks,
+                is_equal_timestamp=random.random() > 0.5,
+                nanoseconds=random.choice((None, 1)),
+                symbol=symbol,
+            )
+    data_frame = pd.DataFrame(trades)
+    for has_multiple_symbols in (False, True):
+        df = aggregate_trades(data_frame, has_multiple_symbols=has_multiple_symbols)
+        expected = reference_aggregate_trades(
+            data_frame, has_multiple_symbols=has_multiple_symbols
+        )
+        columns = expected.columns
+        pd.testing.assert_frame_equal(df[columns], expected, check_dtype=False)
+
+
+def reference_calc_exponent(volume):
+    exponent = 0
+    if volume > 0:
+        while volume % math.pow(10, exponent + 1) == 0:
+            exponent += 1
+    return exponent
+
+
+def test_exponent_parity():
+    volume = [0, -100, -1.5, 0.5, 1, 10, 15, 100, 1000.0, 2500, 10.5, 1e15, 1e21]
+    volume += [
+        random.randint(1, 100) * pow(10, random.randint(0, 10)) for _ in range(100)
+    ]
+    expected = [reference_calc_exponent(v) for v in volume]
+    assert calc_exponent(volume).tolist() == expected
+
+
+def get_threshold_data_frame(rows=1000):
+    start = datetime.datetime(2021, 1, 1, tzinfo=datetime.timezone.utc)
+    seconds = np.sort(np.random.randint(0, 86400, size=rows))
+    data_frame = pd.DataFrame(
+        {
+            "timestamp": start + pd.to_timedelta(seconds, unit="s"),
+            "nanoseconds": np.random.choice((0, 1, 2), size=rows),
+            "price": np.round(1 + np.random.random(rows) * 10, 1),
+            "slippage": np.random.choice((0.0, 0.5), size=rows),
+            "volume": np.random.randint(1, 1000, size=rows),
+            "notional": np.random.random(rows),
+            "tickRule": np.random.choice((1, -1), size=rows),
+            "exponent": np.random.randint(0, 3, size=rows),
+        }
+    )
+    is_buy = data_frame.tickRule == 1
+    data_frame["buyVolume"] = np.where(is_buy, data_frame.volume, 0)
+    data_frame["buyNotional"] = np.where(is_buy, data_frame.notional, 0)
+    data_frame["ticks"] = 1
+    data_frame["buyTicks"] = np.where(is_buy, 1, 0)
+    return data_frame
+
+
+def reference_get_top_n(data_frame, top_n=10):
+    if top_n:
+        columns = [column for column in data_frame.columns if column in TOP_N_COLUMNS]
+        top = data_frame.nlargest(top_n, "volume")[columns].to_dict("records")
+        top.sort(key=itemgetter("timestamp", "nanoseconds"))
+        return top
+    return []
+
+
+def reference_aggregate_rows(data_frame, start, stop=None, top_n=10):
+    df = data_frame.loc[start:stop]
+    buy_side = df[df.tickRule == 1]
+    return {
+        "date": df.iloc[-1].timestamp.date(),
+        "timestamp": df.iloc[-1].timestamp,
+        "nanoseconds": df.iloc[-1].nanoseconds,
+        "open": df.iloc[0].price,
+        "high": df.price.max(),
+        "low": df.price.min(),
+        "close": df.iloc[-1].price,
+        "slippage": df.slippage.sum(),
+        "buySlippage": buy_side.slippage.sum(),
+        "volume": df.volume.sum(),
+        "buyVolume": buy_side.volume.sum(),
+        "notional": df.notional.sum(),
+        "buyNotional": buy_side.notional.sum(),
+        "ticks": len(df),
+        "buyTicks": len(buy_side),
+        "topN": reference_get_top_n(df, top_n=top_n),
+    }
+
+
+def reference_aggregate_threshold(data_frame, cache, thresh_attr, top_n=10):
+    """Row by row, as before."""
+    start = 0
+    samples = []
+    for index, row in data_frame.iterrows():
+        cache[thresh_attr] += row[thresh_attr]
+        if cache[thresh_attr] >= cache["target"]:
+            samples.append(
+                reference_aggregate_rows(data_frame, start, stop=index, top_n=top_n)
+            )
+            cache[thresh_attr] = 0
+            start = index + 1
+    if start != len(data_frame):
+        cache = get_next_cache(data_frame, cache, start, top_n=top_n)
+    return samples, cache
+
+
+def assert_samples_equal(samples, expected):
+    assert [s["topN"] for s in samples] == [e["topN"] for e in expected]
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(samples).drop(columns="topN"),
+        pd.DataFrame(expected).drop(columns="topN"),
+        check_dtype=False,
+    )
+
+
+def test_aggregate_rows():
+    data_frame = get_threshold_data_frame(rows=100)
+    for start, stop in ((0, None), (0, 0), (10, 20), (99, None)):
+        sample = aggregate_rows(data_frame, start, stop=stop, top_n=3)
+        expected = reference_aggregate_rows(data_frame, start, stop=stop, top_n=3)
+        assert_samples_equal([sample], [expected])
+
+
+def test_bar_statistics():
+    data_frame = get_threshold_data_frame()
+    stops = np.sort(np.random.choice(np.arange(10, 1000), size=50, replace=False))
+    stats = get_bar_statistics(data_frame, stops, start=5)
+    starts = [5] + [stop + 1 for stop in stops[:-1]]
+    assert stats["start"].tolist() == starts
+    expected = pd.DataFrame(
+        [
+            reference_aggregate_rows(data_frame, start, stop=stop, top_n=0)
+            for start, stop in zip(starts, stops)
+        ]
+    )
+    for key in expected.columns.drop(["date", "topN"]):
+        assert len(stats[key]) == len(stops)
+        pd.testing.assert_series_equal(
+            pd.Series(stats[key], name=key), expected[key], check_dtype=False
+        )
+
+
+def test_aggregate_threshold_parity():
+    for thresh_attr, thresh_value in (
+        ("volume", 5000),
+        ("volume", 100000),
+        ("buyVolume", 5000),
+        ("notional", 7.5),
+        ("buyNotional", 7.5),
+        ("ticks", 10),
+        ("buyTicks", 1),
+    ):
+        cache = get_initial_threshold_cache(thresh_attr, thresh_value)
+        expected_cache = deepcopy(cache)
+        # Partial sum, and next day, are carried over
+        for _ in range(3):
+            data_frame = get_threshold_data_frame()
+            samples, cache = aggregate_threshold(
+                data_frame, cache, thresh_attr, top_n=3
+            )
+            expected, expected_cache = reference_aggregate_threshold(
+                data_frame, expected_cache, thresh_attr, top_n=3
+            )
+            assert len(samples)
+            assert_samples_equal(samples, expected)
+            assert math.isclose(cache[thresh_attr], expected_cache[thresh_attr])
+            if "nextDay" in expected_cache:
+                assert_samples_equal([cache["nextDay"]], [expected_cache["nextDay"]])
+
+
+def test_aggregate_threshold_no_samples():
+    data_frame = get_threshold_data_frame(rows=10)
+    cache = get_initial_threshold_cache("volume", float("inf"))
+    samples, cache = aggregate_threshold(data_frame, cache, "volume")
+    assert samples == []
+    assert cache["volume"] == data_frame.volume.sum()
+    assert cache["nextDay"]["ticks"] == 10
+
+
+def test_top_n():
+    data_frame = get_threshold_data_frame()
+    # Equal volumes
+    data_frame["volume"] = np.random.randint(1, 10, size=len(data_frame))
+    for top_n in (0, 1, 5):
+        expected = reference_get_top_n(data_frame, top_n=top_n)
+        top = TopN(top_n)
+        for record in data_frame.to_dict("records"):
+            top.push(record)
+        columns = [column for column in data_frame.columns if column in TOP_N_COLUMNS]
+        assert [{key: r[key] for key in columns} for r in top.to_records()] == expected
+        top = TopN(top_n)
+        for index in range(0, len(data_frame), 100):
+            top.update(data_frame.iloc[index : index + 100])
+        assert top.to_records() == expected
+        assert TopN(top_n, top.to_cache()).to_records() == expected
+
+
+def test_top_n_merge():
+    data_frame = get_threshold_data_frame()
+    data_frame["volume"] = np.random.randint(1, 10, size=len(data_frame))
+    previous, current = TopN(3), TopN(3)
+    previous.update(data_frame.iloc[:500])
+    current.update(data_frame.iloc[500:])
+    expected = reference_get_top_n(data_frame, top_n=3)
+    assert previous.merge(current).to_records() == expected
+
+
+def test_merge_cache_top_n():
+    data_frame = get_threshold_data_frame(rows=20)
+    data_frame["volume"] = np.arange(20)
+    previous = aggregate_rows(data_frame, 0, stop=9, top_n=2)
+    current = aggregate_rows(data_frame, 10, top_n=2)
+    sample = merge_cache(previous, current, top_n=2)
+    assert [t["volume"] for t in sample["topN"]] == [18, 19]
+
+
+def reference_preprocess_data_frame(data_frame):
+    data_frame["date"] = data_frame.apply(lambda x: x.timestamp.date(), axis=1)
+    data_frame["hour"] = data_frame.apply(lambda x: x.timestamp.hour, axis=1)
+    for side, tick_rule in (("buy", 1), ("sell", -1)):
+        data_frame[f"{side}Slippage"] = data_frame.apply(
+            lambda x: x.slippage if x.tickRule == tick_rule else 0, axis=1
+        )
+        data_frame[f"{side}Volume"] = data_frame.apply(
+            lambda x: x.volume if x.tickRule == tick_rule else 0, axis=1
+        )
+        data_frame[f"{side}Notional"] = data_frame.apply(
+            lambda x: x.volume / x.price if x.tickRule == tick_rule else 0, axis=1
+        )
+        data_frame[f"{side}Ticks"] = data_frame.apply(
+            lambda x: 1 if x.tickRule == tick_rule else 0, axis=1
+        )
+    data_frame["ticks"] = 1
+    return data_frame
+
+
+def test_preprocess_data_frame():
+    data_frame = get_threshold_data_frame()
+    columns = list(data_frame.columns.difference(DERIVED_COLUMNS))
+    data_frame = data_frame[columns]
+    expected = reference_preprocess_data_frame(data_frame.copy())
+    data_frame = preprocess_data_frame(data_frame.copy())
+    pd.testing.assert_frame_equal(data_frame, expected[data_frame.columns])
+    # Lazy
+    df = preprocess_data_frame(data_frame[columns].copy(), columns=("buyVolume",))
+    assert list(df.columns) == columns + ["buyVolume"]
+
+
+def test_adaptive_target():
+    window_size = 7
+    values = [random.random() * 1000 for _ in range(30)]
+    for target_type in (SMA, EMA):
+        cache = get_initial_adaptive_threshold_cache("volume")
+        for index, value in enumerate(values):
+            cache = update_adaptive_cache_window(
+                cache, value, window_size, target_type=target_type
+            )
+            if index < window_size:
+                assert cache["target"] == float("inf")
+            else:
+                series = pd.Series(values[: index + 1])
+                if target_type == SMA:
+                    # Mean of the window
+                    target = series[-window_size:].mean()
+                else:
+                    target = series.ewm(span=window_size, adjust=False).mean()
+                    target = target.iloc[-1]
+                assert math.isclose(cache["target"], target / 24)
+        # Window does not grow
+        if target_type == SMA:
+            assert len(cache["window"]["values"]) == window_size
+        else:
+            assert "values" not in cache["window"]
+
+
+def test_adaptive_target_list_window():
+    values = [float(value) for value in range(1, 8)]
+    cache = {"volume": 0, "target": float("inf"), "window": values}
+    cache = update_adaptive_cache_window(cache, 8.0, 7)
+    assert cache["window"]["values"] == [8.0] + values[1:]
+    assert math.isclose(cache["target"], sum(range(2, 9)) / 7 / 24)
+
+
+class BigQueryLoader:
+    """Partitions by table, without BigQuery."""
+
+    tables = {}
+    queries = []
+
+    def __init__(self, table_name, date):
+        self.table_name = table_name
+        self.date = date
+
+    def read_table(self, sql, job_config):
+        self.queries.append((self.table_name, self.date))
+        return self.tables[self.table_name][self.date].copy()
+
+    def write_table(self, schema, data):
+        self.tables.setdefault(self.table_name, {})[self.date] = data
+
+
+def set_threshold_source(monkeypatch, source_table, dates):
+    monkeypatch.setattr(cryptotick.aggregators.base, "FirestoreCache", FirestoreCache)
+    monkeypatch.setattr(
+        cryptotick.aggregators.threshold.base, "BigQueryLoader", BigQueryLoader
+    )
+    monkeypatch.setenv(BIGQUERY_DATASET, "test")
+    FirestoreCache.documents = {}
+    BigQueryLoader.tables = {source_table: {}}
+    for date in dates:
+        data_frame = get_threshold_data_frame()
+        data_frame = data_frame[[c for c in data_frame if c not in DERIVED_COLUMNS]]
+        delta = date - datetime.date(2021, 1, 1)
+        data_frame["timestamp"] += pd.Timedelta(delta)
+        BigQueryLoader.tables[source_table][date] = data_frame
+        candle = {"open": {"timestamp": data_frame.timestamp.iloc[0]}}
+        document = {"ok": True, "candles": [candle]}
+        collection = source_table.replace("_", "-")
+        FirestoreCache(collection).set(date.isoformat(), document)
+
+
+def test_multi_threshold(monkeypatch):
+    source_table = "bitmex_XBTUSD"
+    dates = [datetime.date(2021, 1, 1), datetime.date(2021, 1, 2)]
+    thresholds = [
+        ("volume_bars", "volume", 50000),
+        ("tick_bars", "ticks", 100),
+        ("buy_notional_bars", "buyNotional", 5),
+    ]
+    kwargs = {"top_n": 3, "date_from": "2021-01-01", "date_to": "2021-01-02"}
+    set_threshold_source(monkeypatch, source_table, dates)
+    source = BigQueryLoader.tables[source_table]
+    BigQueryLoader.queries = []
+    MultiThresholdAggregator(source_table, thresholds, **kwargs).main()
+    # Queried once per day.
+    assert BigQueryLoader.queries == [(source_table, date) for date in dates]
+    tables = BigQueryLoader.tables
+    documents = FirestoreCache.documents
+    for destination_table, thresh_attr, thresh_value in thresholds:
+        # Separate cache, and destination.
+        collection = destination_table.replace("_", "-")
+        cache = documents[collection][dates[-1].isoformat()]
+        assert cache["target"] == thresh_value
+        assert thresh_attr in cache
+        # Equal to each threshold on its own.
+        BigQueryLoader.tables = {source_table: source}
+        source_collection = source_table.replace("_", "-")
+        FirestoreCache.documents = {source_collection: documents[source_collection]}
+        aggregator = ThresholdAggregator(
+            source_table, destination_table, thresh_attr, thresh_value, **kwargs
+        )
+        aggregator.main()
+        expected = BigQueryLoader.tables[destination_table]
+        assert list(tables[destination_table]) == dates
+        for date in dates:
+            assert len(tables[destination_table][date])
+            assert tables[destination_table][date] == expected[date]
+        assert FirestoreCache.documents[collection] == documents[collection]
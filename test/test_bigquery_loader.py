@@ -6,7 +6,7 @@ import firebase_admin
 import google.auth
 import main
 import pytest
-from cryptotick.bqloader import get_table_id
+from cryptotick.bqloader import clear_tables, get_table_id
 from cryptotick.constants import (
     BIGQUERY_LOCATION,
     BIGQUERY_TABLES,
@@ -45,6 +45,8 @@ def cleanup_bigquery():
                 bq.delete_table(table_id)
             except NotFound:
                 pass
+        # Deleted, without the loader.
+        clear_tables()
 
 
 def cleanup_firestore():
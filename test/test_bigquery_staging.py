@@ -0,0 +1,154 @@
+import datetime
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from cryptotick.bqloader import (
+    MULTIPLE_SYMBOL_SCHEMA,
+    SINGLE_SYMBOL_BAR_SCHEMA,
+    BigQueryLoader,
+    clear_tables,
+    get_schema_columns,
+    stringify_datetime_types,
+)
+from cryptotick.bqloader.staging import to_arrow_table, to_parquet
+from cryptotick.constants import BIGQUERY_DATASET
+from cryptotick.s3downloader import (
+    calculate_index,
+    calculate_notional,
+    calculate_tick_rule,
+    set_columns,
+    set_types,
+    strip_nanoseconds,
+    utc_timestamp,
+)
+from cryptotick.s3downloader.constants import COMPACT
+from google.cloud.exceptions import NotFound
+
+from .test_s3downloader import get_data_frame
+from .utils import get_trade
+
+
+def get_bar(index, top_n=2):
+    timestamp = datetime.datetime(2021, 1, 1, 0, index, tzinfo=datetime.timezone.utc)
+    top = []
+    for _ in range(top_n):
+        trade = get_trade(timestamp=timestamp, tick_rule=1)
+        trade.update({"slippage": 0.0, "exponent": 0})
+        top.append(stringify_datetime_types(trade))
+    bar = {
+        "date": timestamp.date(),
+        "timestamp": timestamp,
+        "nanoseconds": 0,
+        "ticks": 2,
+        "buyTicks": 1,
+        "index": index,
+        "topN": top,
+    }
+    for key in ("open", "high", "low", "close", "volume", "notional"):
+        bar[key] = float(index)
+    for key in ("slippage", "buySlippage", "buyVolume", "buyNotional"):
+        bar[key] = 0.0
+    return stringify_datetime_types(bar)
+
+
+def test_bars_to_parquet():
+    # Maybe no top N
+    bars = [get_bar(index, top_n=index % 3) for index in range(10)]
+    table = pq.read_table(to_parquet(to_arrow_table(bars, SINGLE_SYMBOL_BAR_SCHEMA)))
+    for bar, row in zip(bars, table.to_pylist()):
+        assert row["date"].isoformat() == bar["date"]
+        assert row["timestamp"].isoformat() == bar["timestamp"]
+        assert len(row["topN"]) == len(bar["topN"])
+        for t, r in zip(bar["topN"], row["topN"]):
+            assert r["timestamp"].isoformat() == t["timestamp"]
+            assert r["volume"] == t["volume"]
+
+
+def test_compact_data_frame_to_arrow():
+    data_frame = get_data_frame()
+    data_frame = utc_timestamp(data_frame)
+    data_frame = strip_nanoseconds(data_frame)
+    data_frame = set_columns(data_frame)
+    data_frame = calculate_tick_rule(data_frame)
+    data_frame = calculate_notional(data_frame, lambda df: df.volume / df.price)
+    data_frame = calculate_index(data_frame)
+    data_frame["date"] = data_frame.timestamp.dt.date
+    standard = set_types(data_frame.copy())
+    compact = set_types(data_frame, profile=COMPACT)
+    expected = to_arrow_table(standard, MULTIPLE_SYMBOL_SCHEMA)
+    table = to_arrow_table(compact, MULTIPLE_SYMBOL_SCHEMA)
+    assert table.equals(expected)
+    assert table.column_names == get_schema_columns(MULTIPLE_SYMBOL_SCHEMA)
+    pd.testing.assert_series_equal(
+        table.column("symbol").to_pandas(),
+        standard.symbol.reset_index(drop=True),
+    )
+
+
+class Job:
+    def result(self):
+        return self
+
+
+class Client:
+    """Tables, and loads, without BigQuery."""
+
+    project = "test"
+
+    def __init__(self, not_found=0):
+        self.not_found = not_found
+        self.list_tables_calls = 0
+        self.tables = []
+        self.loads = []
+
+    def list_tables(self, dataset):
+        self.list_tables_calls += 1
+        return []
+
+    def create_table(self, table, exists_ok=False):
+        self.tables.append(table.table_id)
+        return table
+
+    def load_table_from_file(self, parquet, destination, job_config=None):
+        # Deleted by another process.
+        if self.not_found:
+            self.not_found -= 1
+            raise NotFound(destination)
+        self.loads.append(destination)
+        return Job()
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setenv(BIGQUERY_DATASET, "test")
+    clear_tables()
+    yield
+    clear_tables()
+
+
+def test_tables_listed_once(registry):
+    client = Client()
+    bars = [get_bar(index) for index in range(3)]
+    for day in range(1, 4):
+        date = datetime.date(2021, 1, day)
+        for table_name in ("bars", "other_bars"):
+            bigquery_loader = BigQueryLoader(table_name, date, client=client)
+            bigquery_loader.write_table(SINGLE_SYMBOL_BAR_SCHEMA, bars)
+    assert client.list_tables_calls == 1
+    # Created once.
+    assert client.tables == ["bars", "other_bars"]
+    assert len(client.loads) == 6
+
+
+def test_write_table_not_found(registry):
+    client = Client(not_found=1)
+    date = datetime.date(2021, 1, 1)
+    bigquery_loader = BigQueryLoader("bars", date, client=client)
+    bigquery_loader.write_table(SINGLE_SYMBOL_BAR_SCHEMA, [get_bar(0)])
+    # Created again, and retried once.
+    assert client.tables == ["bars", "bars"]
+    assert client.loads == ["test.bars$20210101"]
+    client.not_found = 2
+    with pytest.raises(NotFound):
+        bigquery_loader.write_table(SINGLE_SYMBOL_BAR_SCHEMA, [get_bar(0)])
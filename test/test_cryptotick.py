@@ -0,0 +1,153 @@
+import datetime
+
+import cryptotick.cryptotick
+import cryptotick.providers.bitmex.perpetual
+import pandas as pd
+import pytest
+from cryptotick.constants import DTYPE_PROFILE
+from cryptotick.cryptotick import S3CryptoExchangeETL
+from cryptotick.providers.bitmex import BitmexPerpetualETL
+from cryptotick.providers.bitmex.constants import ETHUSD, XBTUSD
+from cryptotick.s3downloader.constants import COMPACT, STANDARD
+
+from .test_s3downloader import get_data_frame
+from .utils import FirestoreCache
+
+
+class BatchLoader:
+    """Buffered dates, without BigQuery."""
+
+    def __init__(self, table_name, schema, max_dates=31):
+        self.table_name = table_name
+        self.pending = []
+        self.data = []
+
+    def add(self, date, data, callback=None):
+        self.pending.append((date, data, callback))
+        self.data.append(data)
+
+    def flush(self):
+        pending, self.pending = self.pending, []
+        for _, _, callback in pending:
+            callback()
+
+
+@pytest.mark.parametrize("profile", [STANDARD, COMPACT])
+def test_backfill_multiple_symbols(monkeypatch, profile):
+    FirestoreCache.documents = {}
+    monkeypatch.setattr(cryptotick.cryptotick, "FirestoreCache", FirestoreCache)
+    monkeypatch.setattr(
+        cryptotick.providers.bitmex.perpetual, "FirestoreCache", FirestoreCache
+    )
+    monkeypatch.setattr(cryptotick.cryptotick, "BatchLoader", BatchLoader)
+    monkeypatch.setenv(DTYPE_PROFILE, profile)
+    date = datetime.date(2021, 1, 1)
+    etl = BitmexPerpetualETL(
+        [XBTUSD, ETHUSD],
+        date_from=date.isoformat(),
+        date_to=date.isoformat(),
+        backfill=5,
+    )
+    etl.date = date
+    data_frame = get_data_frame()
+    etl.process_dataframe(data_frame.copy())
+    # Not marked, until flushed.
+    assert not FirestoreCache.documents
+    # Types of the profile, until loaded.
+    for data in [d for b in etl.batch_loaders.values() for d in b.data]:
+        if profile == COMPACT:
+            assert data.timestamp.dtype == "int64"
+            assert data.tickRule.dtype == "int8"
+            assert data.nanoseconds.dtype == "int16"
+        else:
+            assert data.tickRule.dtype == "int64"
+    etl.flush()
+    document = date.isoformat()
+    for symbol in (XBTUSD, ETHUSD):
+        collection = cryptotick.cryptotick.get_collection_name("bitmex", suffix=symbol)
+        data = FirestoreCache(collection).get(document)
+        assert data["ok"]
+        # Candles of the symbol.
+        df = data_frame[data_frame.symbol == symbol]
+        volume = sum(candle.get("volume", 0) for candle in data["candles"])
+        assert volume == df.volume.sum()
+    assert etl.has_data(date)
+
+
+class Downloader:
+    def __init__(self, url, downloads):
+        self.url = url
+        self.downloads = downloads
+
+    def main(self):
+        self.downloads.append(self.url)
+        return pd.DataFrame({"url": [self.url] * 1000})
+
+
+class ETL(S3CryptoExchangeETL):
+    """Dates, without S3, which are skipped if they have data."""
+
+    def __init__(self, date_from, date_to, skip=(), prefetch=2):
+        super().__init__(
+            "test",
+            "TEST",
+            date_from,
+            date_from=date_from.isoformat(),
+            date_to=date_to.isoformat(),
+        )
+        self.skip = skip
+        self.prefetch = prefetch
+        self.downloads = []
+        # Downloads, when each date is yielded.
+        self.scheduled = []
+
+    def has_data(self, date):
+        return date in self.skip
+
+    def get_url(self, date):
+        return date.isoformat()
+
+    def get_downloader(self, url):
+        return Downloader(url, self.downloads)
+
+    def prefetch_date(self, executor, date):
+        future = super().prefetch_date(executor, date)
+        # Done, so memory usage is known when scheduling.
+        if future:
+            future.result()
+        return future
+
+    def iter_data_frames(self):
+        for date, data_frame in super().iter_data_frames():
+            self.scheduled.append(len(self.downloads))
+            yield date, data_frame
+
+
+def test_iter_data_frames():
+    date_from = datetime.date(2021, 1, 1)
+    date_to = datetime.date(2021, 1, 6)
+    skip = (datetime.date(2021, 1, 2), datetime.date(2021, 1, 5))
+    etl = ETL(date_from, date_to, skip=skip)
+    dates = []
+    for date, data_frame in etl.iter_data_frames():
+        dates.append(date)
+        if date in skip:
+            assert data_frame is None
+        else:
+            assert data_frame.url.unique().tolist() == [date.isoformat()]
+    # Reverse order.
+    assert dates == [date_to - datetime.timedelta(days=d) for d in range(6)]
+    assert etl.downloads == [d.isoformat() for d in dates if d not in skip]
+    # Prefetched ahead of the current date, 3 dates, of which 1 has data.
+    assert etl.scheduled[0] == 2
+
+
+def test_iter_data_frames_max_memory():
+    date_from = datetime.date(2021, 1, 1)
+    date_to = datetime.date(2021, 1, 6)
+    etl = ETL(date_from, date_to)
+    etl.max_prefetch_memory = 0
+    dates = [date for date, _ in etl.iter_data_frames()]
+    assert len(dates) == 6
+    # Scheduling pauses, until each prefetched date is processed.
+    assert etl.scheduled == [1, 2, 3, 4, 5, 6]
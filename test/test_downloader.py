@@ -0,0 +1,352 @@
+import datetime
+import gzip
+import os
+import random
+import threading
+
+import httpx
+import pandas as pd
+import pytest
+from cryptotick import httpclient
+from cryptotick.providers.bitmex.constants import TIMESTAMP_FORMAT
+from cryptotick.s3downloader import HistoricalDownloader, download
+from cryptotick.s3downloader.cache import ArchiveCache
+from cryptotick.s3downloader.constants import PYARROW, PYTHON
+from cryptotick.s3downloader.engines import read_csv
+from cryptotick.s3downloader.stream import GzipStream, iter_background
+
+from .test_s3downloader import SYMBOLS, TICK_DIRECTIONS
+
+COLUMNS = ("timestamp", "symbol", "size", "tickDirection", "price")
+
+
+def get_csv(rows=1000):
+    start = datetime.datetime(2021, 1, 1)
+    lines = [",".join(COLUMNS)]
+    for index in range(rows):
+        timestamp = start + datetime.timedelta(milliseconds=index)
+        line = (
+            timestamp.strftime(TIMESTAMP_FORMAT),
+            random.choice(SYMBOLS),
+            str(random.randint(1, 100000)),
+            random.choice(TICK_DIRECTIONS),
+            str(round(1 + random.random() * 1000, 1)),
+        )
+        lines.append(",".join(line))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def get_archive(data, members=1):
+    """Maybe concatenated gzip members, split on lines."""
+    lines = data.splitlines(keepends=True)
+    size = -(-len(lines) // members)
+    return b"".join(
+        gzip.compress(b"".join(lines[index : index + size]))
+        for index in range(0, len(lines), size)
+    )
+
+
+def write_archive(tmp_path, compressed, name="archive.gz"):
+    filename = tmp_path / name
+    filename.write_bytes(compressed)
+    return str(filename)
+
+
+@pytest.mark.parametrize("members", [1, 3])
+def test_read_csv_engines(tmp_path, members):
+    data = get_csv()
+    filename = write_archive(tmp_path, get_archive(data, members=members))
+    expected = pd.read_csv(gzip.open(filename))
+    for engine in (PYARROW, PYTHON):
+        data_frame = read_csv(filename, COLUMNS, engine=engine)
+        assert len(data_frame) == len(expected)
+        assert data_frame["size"].tolist() == expected["size"].tolist()
+
+
+def test_read_csv_truncated(tmp_path):
+    compressed = get_archive(get_csv(rows=10000))
+    filename = write_archive(tmp_path, compressed[: len(compressed) // 2])
+    for engine in (PYARROW, PYTHON):
+        with pytest.raises(EOFError):
+            read_csv(filename, COLUMNS, engine=engine)
+        data_frame = read_csv(filename, COLUMNS, engine=engine, is_truncated=True)
+        assert 0 < len(data_frame) < 10000
+    # Until the last complete line.
+    downloader = HistoricalDownloader(filename, timestamp_format=TIMESTAMP_FORMAT)
+    data_frame = downloader._extract(filename)
+    assert 0 < len(data_frame) < 10000
+    assert not data_frame.isnull().any().any()
+
+
+URL = "https://example.com/archive.csv.gz"
+
+
+class Stream(httpx.SyncByteStream):
+    """Response body, which may end, or raise, after some bytes."""
+
+    def __init__(self, data, chunk_size=1024, error=None):
+        self.data = data
+        self.chunk_size = chunk_size
+        self.error = error
+
+    def __iter__(self):
+        for index in range(0, len(self.data), self.chunk_size):
+            yield self.data[index : index + self.chunk_size]
+        if self.error:
+            raise self.error
+
+
+class Server:
+    """
+    First response is interrupted at half, with an error or a short read.
+    Range requests are answered by the handler of the test.
+    """
+
+    def __init__(self, data, handler=None, error=True, etag='"1"'):
+        self.data = data
+        self.handler = handler
+        # If no handler, not interrupted.
+        self.error = error
+        self.etag = etag
+        self.requests = []
+
+    def get_headers(self, data, etag=None):
+        return {"Content-Length": str(len(data)), "ETag": etag or self.etag}
+
+    def __call__(self, request):
+        self.requests.append(request)
+        if not self.handler:
+            headers = self.get_headers(self.data)
+            return httpx.Response(200, headers=headers, stream=Stream(self.data))
+        elif len(self.requests) == 1:
+            error = httpx.ReadError("Connection reset") if self.error else None
+            stream = Stream(self.data[: len(self.data) // 2], error=error)
+            return httpx.Response(
+                200, headers=self.get_headers(self.data), stream=stream
+            )
+        return self.handler(self, request)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(download.time, "sleep", lambda seconds: None)
+
+    def get_server(*args, **kwargs):
+        s = Server(*args, **kwargs)
+        client = httpx.Client(transport=httpx.MockTransport(s))
+        monkeypatch.setitem(httpclient.clients, ("https", "example.com", None), client)
+        return s
+
+    return get_server
+
+
+def download_bytes(url=URL):
+    with download.ResumableDownload(url) as d:
+        return b"".join(d.iter_bytes(1024))
+
+
+def partial_content(server, request):
+    start = int(request.headers["Range"][len("bytes=") : -1])
+    data = server.data[start:]
+    headers = server.get_headers(data)
+    headers["Content-Range"] = (
+        f"bytes {start}-{len(server.data) - 1}/{len(server.data)}"
+    )
+    return httpx.Response(206, headers=headers, stream=Stream(data))
+
+
+def ignore_range(server, request):
+    data = server.data
+    return httpx.Response(200, headers=server.get_headers(data), stream=Stream(data))
+
+
+def test_resume_partial_content(server):
+    data = os.urandom(10240)
+    s = server(data, partial_content)
+    assert download_bytes() == data
+    assert len(s.requests) == 2
+    assert s.requests[1].headers["Range"] == "bytes=5120-"
+    assert s.requests[1].headers["If-Range"] == '"1"'
+
+
+def test_resume_short_read(server):
+    data = os.urandom(10000)
+    s = server(data, partial_content, error=False)
+    assert download_bytes() == data
+    assert len(s.requests) == 2
+
+
+def test_resume_range_ignored(server):
+    data = os.urandom(10000)
+    s = server(data, ignore_range)
+    # Bytes already received are skipped.
+    assert download_bytes() == data
+    assert len(s.requests) == 2
+
+
+def test_resume_file_changed(server):
+    def changed(server, request):
+        data = server.data
+        headers = server.get_headers(data, etag='"2"')
+        return httpx.Response(200, headers=headers, stream=Stream(data))
+
+    server(os.urandom(10000), changed)
+    with pytest.raises(download.ResumeError):
+        download_bytes()
+
+
+def test_restart_file_changed(server, tmp_path):
+    data = get_archive(get_csv(rows=10000))
+    changed = get_archive(get_csv(rows=5000))
+
+    def handler(server, request):
+        # Changed, with or without range.
+        headers = server.get_headers(changed, etag='"2"')
+        return httpx.Response(200, headers=headers, stream=Stream(changed))
+
+    s = server(data, handler)
+    cache = ArchiveCache(str(tmp_path))
+    data_frame = HistoricalDownloader(URL, cache=cache).main()
+    assert len(data_frame) == 5000
+    # Restarted, without range.
+    assert len(s.requests) == 3
+    assert "Range" not in s.requests[2].headers
+    # Partial download is discarded.
+    assert sorted(path.suffix for path in tmp_path.iterdir()) == [".gz", ".json"]
+    assert (tmp_path / f"{cache.get_key(URL)}.gz").read_bytes() == changed
+
+
+def test_gzip_stream_members():
+    data = get_csv()
+    compressed = get_archive(data, members=3)
+    chunks = (compressed[i : i + 100] for i in range(0, len(compressed), 100))
+    assert GzipStream(chunks).read() == data
+
+
+def test_gzip_stream_truncated():
+    compressed = get_archive(get_csv())
+    stream = GzipStream(iter([compressed[: len(compressed) // 2]]))
+    with pytest.raises(EOFError):
+        stream.read()
+    # Empty response is not truncated.
+    assert GzipStream(iter([])).read() == b""
+
+
+def test_stop_early(tmp_path):
+    def iter_chunks():
+        while True:
+            yield os.urandom(1024)
+
+    threads = threading.active_count()
+    cache = ArchiveCache(str(tmp_path))
+    chunks = iter_background(cache.iter_set(URL, iter_chunks(), {}), maxsize=2)
+    for _ in range(3):
+        next(chunks)
+    chunks.close()
+    # Producer thread exited, and temp file was removed.
+    assert threading.active_count() == threads
+    assert not list(tmp_path.iterdir())
+    assert cache.get(URL) is None
+
+
+@pytest.mark.parametrize("engine", [PYARROW, PYTHON])
+def test_stream_index(server, engine):
+    # Arrow blocks are at least 1MB.
+    server(get_archive(get_csv(rows=30000), members=2))
+    expected = HistoricalDownloader(URL, engine=engine).main()
+    downloader = HistoricalDownloader(URL, chunksize=1000, engine=engine)
+    data_frames = list(downloader.stream())
+    assert len(data_frames) > 1
+    data_frame = pd.concat(data_frames)
+    # Index is continuous, as if the file was read at once.
+    assert data_frame.index.tolist() == list(range(30000))
+    pd.testing.assert_frame_equal(data_frame, expected)
+    pd.testing.assert_frame_equal(downloader.main(), expected)
+
+
+def test_cache_headers(tmp_path):
+    cache = ArchiveCache(str(tmp_path))
+    assert cache.get_headers(URL) == {}
+    headers = {"ETag": '"1"', "Last-Modified": "Fri, 01 Jan 2021 00:00:00 GMT"}
+    filename = cache.set(URL, [b"data"], headers)
+    assert cache.get(URL) == filename
+    assert cache.get_headers(URL) == {
+        "If-None-Match": '"1"',
+        "If-Modified-Since": "Fri, 01 Jan 2021 00:00:00 GMT",
+    }
+
+
+def test_cache_not_modified(server, tmp_path):
+    def not_modified(server, request):
+        assert request.headers["If-None-Match"] == server.etag
+        return httpx.Response(304, headers={"ETag": server.etag})
+
+    data = get_archive(get_csv())
+    s = server(data)
+    cache = ArchiveCache(str(tmp_path))
+    expected = HistoricalDownloader(URL, cache=cache).main()
+    s.handler = not_modified
+    # Cached, with or without chunks.
+    pd.testing.assert_frame_equal(
+        HistoricalDownloader(URL, cache=cache).main(), expected
+    )
+    downloader = HistoricalDownloader(URL, chunksize=1000, cache=cache)
+    pd.testing.assert_frame_equal(pd.concat(downloader.stream()), expected)
+    assert len(s.requests) == 3
+
+
+def test_cache_evicted_not_modified(server, tmp_path):
+    def evicted(server, request):
+        # Evicted, while revalidated.
+        if "If-None-Match" in request.headers:
+            for path in tmp_path.iterdir():
+                path.unlink()
+            return httpx.Response(304, headers={"ETag": server.etag})
+        return ignore_range(server, request)
+
+    data = get_archive(get_csv())
+    s = server(data)
+    cache = ArchiveCache(str(tmp_path))
+    expected = HistoricalDownloader(URL, cache=cache).main()
+    s.handler = evicted
+    # Downloaded again, with or without chunks.
+    pd.testing.assert_frame_equal(
+        HistoricalDownloader(URL, cache=cache).main(), expected
+    )
+    downloader = HistoricalDownloader(URL, chunksize=1000, cache=cache)
+    pd.testing.assert_frame_equal(pd.concat(downloader.stream()), expected)
+    assert len(s.requests) == 5
+    assert "If-None-Match" not in s.requests[2].headers
+    assert "If-None-Match" not in s.requests[4].headers
+
+
+def test_cache_commit_on_complete(tmp_path):
+    def iter_chunks():
+        yield b"data"
+        raise httpx.ReadError("Connection reset")
+
+    cache = ArchiveCache(str(tmp_path))
+    for set_cache in (cache.set, lambda *args: list(cache.iter_set(*args))):
+        with pytest.raises(httpx.ReadError):
+            set_cache(URL, iter_chunks(), {"ETag": '"1"'})
+        assert not list(tmp_path.iterdir())
+        assert cache.get(URL) is None
+        assert cache.get_headers(URL) == {}
+
+
+@pytest.mark.parametrize("use", ["get", "get_headers"])
+def test_cache_evict(tmp_path, use):
+    # 1MB
+    cache = ArchiveCache(str(tmp_path), max_size=1)
+    data = os.urandom(400 * 1024)
+    urls = [f"{URL}?{index}" for index in range(3)]
+    for index, url in enumerate(urls[:2]):
+        filename = cache.set(url, [data], {})
+        os.utime(filename, (index, index))
+    # Most recently used, if read or revalidated.
+    getattr(cache, use)(urls[0])
+    cache.set(urls[2], [data], {})
+    assert cache.get(urls[0])
+    assert cache.get(urls[1]) is None
+    assert cache.get(urls[2])
+    assert len(list(tmp_path.iterdir())) == 4
@@ -13,6 +13,13 @@ def assert_200(exchange):
     assert len(data_frame) > 0
 
 
+def assert_symbols(exchange):
+    url = BitmexPerpetualETL(SYMBOLS).get_url(MIN_DATE)
+    data_frame = HistoricalDownloader(url, symbols=SYMBOLS).main()
+    assert len(data_frame) > 0
+    assert data_frame.symbol.unique().tolist() == SYMBOLS
+
+
 def assert_404(exchange):
     now = datetime.datetime.utcnow()
     delta = now + datetime.timedelta(days=1)
@@ -26,5 +33,9 @@ def test_bitmex_200():
     assert_200(BITMEX)
 
 
+def test_bitmex_symbols():
+    assert_symbols(BITMEX)
+
+
 def test_bitmex_404():
     assert_404(BITMEX)
@@ -1,8 +1,19 @@
 import datetime
+import random
+from copy import deepcopy
 
+import numpy as np
 import pandas as pd
-from cryptotick.aggregators.lib import calc_exponent
-from cryptotick.aggregators.renko.lib import aggregate_renko, get_initial_cache
+from cryptotick.aggregators.experimental.renko.lib import (
+    aggregate_renko,
+    get_bounds,
+    get_change,
+    get_initial_cache,
+    get_level,
+    get_log_level,
+)
+from cryptotick.aggregators.lib import aggregate_rows, get_next_cache, merge_cache
+from cryptotick.aggregators.trades.lib import calc_exponent
 
 from .utils import get_trade
 
@@ -14,9 +25,10 @@ def get_data_frame(all_trades, date=None):
         t = get_trade(**trade)
         t["date"] = trade.get("date", date)
         t["slippage"] = trade.get("slippage", 0)
-        t["exponent"] = calc_exponent(t["volume"])
         trades.append(t)
-    return pd.DataFrame(trades)
+    data_frame = pd.DataFrame(trades)
+    data_frame["exponent"] = calc_exponent(data_frame.volume)
+    return data_frame
 
 
 def aggregate(data_frame, cache=None, box_size=1, top_n=10):
@@ -153,3 +165,69 @@ def test_top2_with_cache():
     assert top[0]["timestamp"] < top[1]["timestamp"]
     assert top[0]["notional"] == 3
     assert top[1]["notional"] == 2
+
+
+def reference_aggregate_renko(
+    data_frame, cache, box_size, top_n=10, reversal=1, level_func=get_level
+):
+    """Row by row, as before."""
+    start = 0
+    samples = []
+    high, low = get_bounds(cache, box_size, reversal=reversal)
+    for index, row in data_frame.iterrows():
+        level, change = get_change(
+            cache, high, low, row.price, box_size, level_func=level_func
+        )
+        if change:
+            sample = aggregate_rows(
+                data_frame, start, stop=index, top_n=top_n, extra={"level": level}
+            )
+            if "nextDay" in cache:
+                sample = merge_cache(cache.pop("nextDay"), sample, top_n=top_n)
+            sample["change"] = change
+            start = index + 1
+            cache["timestamp"] = sample["timestamp"]
+            cache["level"] = level
+            cache["direction"] = np.sign(change)
+            high, low = get_bounds(cache, box_size, reversal=reversal)
+            samples.append(sample)
+    if start != len(data_frame):
+        cache = get_next_cache(data_frame, cache, start, top_n=top_n)
+    return samples, cache
+
+
+def get_random_walk(rows=1000, price=100):
+    # Some jumps of more than one box
+    changes = np.random.choice((-0.5, -0.25, 0, 0.25, 0.5, -3, 3), size=rows)
+    trades = [
+        {"price": p, "notional": random.random()}
+        for p in np.maximum(price + np.cumsum(changes), 1)
+    ]
+    return get_data_frame(trades)
+
+
+def test_aggregate_renko_parity():
+    for box_size, reversal, level_func in (
+        (1, 1, get_level),
+        (0.5, 1, get_level),
+        (2, 2, get_level),
+        (0.01, 1, get_log_level),
+    ):
+        data_frame = get_random_walk()
+        data_frame, cache = get_initial_cache(data_frame, box_size, level_func)
+        expected_cache = deepcopy(cache)
+        # Next day is merged with the first brick
+        for df in (data_frame.loc[:499], data_frame.loc[500:]):
+            df = df.reset_index(drop=True)
+            kwargs = {"top_n": 3, "reversal": reversal, "level_func": level_func}
+            samples, cache = aggregate_renko(df, cache, box_size, **kwargs)
+            expected, expected_cache = reference_aggregate_renko(
+                df, expected_cache, box_size, **kwargs
+            )
+            assert len(samples) > 1
+            assert [s["topN"] for s in samples] == [e["topN"] for e in expected]
+            pd.testing.assert_frame_equal(
+                pd.DataFrame(samples).drop(columns="topN"),
+                pd.DataFrame(expected).drop(columns="topN"),
+            )
+            assert cache == expected_cache
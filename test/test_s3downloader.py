@@ -0,0 +1,187 @@
+import datetime
+import random
+from datetime import timezone
+
+import numpy as np
+import pandas as pd
+from cryptotick.bqloader import (
+    MULTIPLE_SYMBOL_SCHEMA,
+    get_schema_columns,
+    set_schema_types,
+)
+from cryptotick.providers.bitmex.constants import (
+    BCHUSD,
+    ETHUSD,
+    LTCUSD,
+    XBTUSD,
+    XRPUSD,
+    uBTC,
+)
+from cryptotick.providers.bitmex.lib import XBT_FUTURES_REGEX, calc_notional
+from cryptotick.providers.bybit.perpetual import calc_notional as bybit_calc_notional
+from cryptotick.s3downloader import (
+    calculate_index,
+    calculate_notional,
+    calculate_tick_rule,
+    set_columns,
+    set_types,
+    strip_nanoseconds,
+    utc_timestamp,
+)
+from cryptotick.s3downloader.constants import COMPACT
+
+SYMBOLS = [XBTUSD, "XBTZ21", ETHUSD, "ETHH22", BCHUSD, LTCUSD, XRPUSD, "ADAZ21"]
+TICK_DIRECTIONS = ["PlusTick", "ZeroPlusTick", "MinusTick", "ZeroMinusTick"]
+
+
+def get_data_frame(rows=1000):
+    start = datetime.datetime(2021, 1, 1)
+    nanoseconds = sorted([random.randint(0, 86400 * 10**9) for _ in range(rows)])
+    # Some timestamps without nanoseconds.
+    nanoseconds = [n - n % 1000 if n % 2 else n for n in nanoseconds]
+    return pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(start) + pd.to_timedelta(nanoseconds),
+            "symbol": [random.choice(SYMBOLS) for _ in range(rows)],
+            "volume": [float(random.randint(1, 100000)) for _ in range(rows)],
+            "price": [round(1 + random.random() * 1000, 1) for _ in range(rows)],
+            "tickDirection": [random.choice(TICK_DIRECTIONS) for _ in range(rows)],
+        }
+    )
+
+
+def reference_utc_timestamp(data_frame):
+    data_frame.timestamp = data_frame.apply(
+        lambda x: x.timestamp.tz_localize(timezone.utc), axis=1
+    )
+    return data_frame
+
+
+def reference_strip_nanoseconds(data_frame):
+    data_frame["nanoseconds"] = data_frame.apply(
+        lambda x: x.timestamp.nanosecond, axis=1
+    )
+    data_frame.timestamp = data_frame.apply(
+        lambda x: (
+            x.timestamp.replace(nanosecond=0) if x.nanoseconds > 0 else x.timestamp
+        ),
+        axis=1,
+    )
+    return data_frame
+
+
+def reference_tick_rule(data_frame):
+    data_frame["tickRule"] = data_frame.apply(
+        lambda x: (1 if x.tickDirection in ("PlusTick", "ZeroPlusTick") else -1),
+        axis=1,
+    )
+    return data_frame
+
+
+def reference_calc_notional(x):
+    if x.symbol == XBTUSD or XBT_FUTURES_REGEX.match(x.symbol):
+        return x.volume / x.price
+    elif x.symbol.startswith(ETHUSD) or x.symbol.startswith(BCHUSD):
+        return x.volume * x.price * uBTC
+    elif x.symbol.startswith(LTCUSD):
+        return x.volume * x.price * uBTC * 2
+    elif x.symbol == XRPUSD:
+        return x.volume * x.price * uBTC / 20
+    elif "USD" in x.symbol:
+        return 0
+    else:
+        return x.volume * x.price
+
+
+def test_utc_timestamp():
+    data_frame = get_data_frame()
+    expected = reference_utc_timestamp(data_frame.copy())
+    pd.testing.assert_frame_equal(utc_timestamp(data_frame), expected)
+
+
+def test_strip_nanoseconds():
+    data_frame = utc_timestamp(get_data_frame())
+    expected = reference_strip_nanoseconds(data_frame.copy())
+    data_frame = strip_nanoseconds(data_frame)
+    assert (data_frame.nanoseconds > 0).any()
+    pd.testing.assert_frame_equal(data_frame, expected)
+
+
+def test_tick_rule():
+    data_frame = get_data_frame()
+    expected = reference_tick_rule(data_frame.copy())
+    pd.testing.assert_frame_equal(calculate_tick_rule(data_frame), expected)
+
+
+def test_notional():
+    data_frame = get_data_frame()
+    expected = data_frame.copy()
+    expected["notional"] = expected.apply(reference_calc_notional, axis=1)
+    data_frame = calculate_notional(data_frame, calc_notional)
+    pd.testing.assert_frame_equal(data_frame, expected)
+    assert np.all(np.isfinite(data_frame.notional))
+
+
+def test_bybit_notional():
+    data_frame = pd.DataFrame(
+        {
+            "symbol": ["BTCUSD", "BTCUSDT", "BTCUSD"],
+            "volume": [100.0, 0.5, 200.0],
+            "price": [50000.0, 50000.0, 40000.0],
+        }
+    )
+    data_frame = calculate_notional(data_frame, bybit_calc_notional)
+    assert data_frame.notional.tolist() == [100 / 50000, 0.5 / 50000, 200 / 40000]
+
+
+def test_index():
+    data_frame = get_data_frame()
+    data_frame = calculate_index(data_frame)
+    assert data_frame["index"].dtype == "int64"
+    for symbol in data_frame.symbol.unique():
+        df = data_frame[data_frame.symbol == symbol]
+        assert df["index"].tolist() == list(range(len(df)))
+
+
+def test_index_base():
+    data_frame = get_data_frame()
+    base = {XBTUSD: 100, ETHUSD: 200}
+    data_frame = calculate_index(data_frame, base=base)
+    for symbol in data_frame.symbol.unique():
+        df = data_frame[data_frame.symbol == symbol]
+        start = base.get(symbol, 0)
+        assert df["index"].tolist() == list(range(start, start + len(df)))
+
+
+def test_compact_types():
+    data_frame = get_data_frame()
+    data_frame = utc_timestamp(data_frame)
+    data_frame = strip_nanoseconds(data_frame)
+    data_frame = set_columns(data_frame)
+    data_frame = calculate_tick_rule(data_frame)
+    data_frame = calculate_notional(data_frame, calc_notional)
+    data_frame = calculate_index(data_frame)
+    expected = set_types(data_frame.copy())
+    compact = set_types(data_frame.copy(), profile=COMPACT)
+    assert compact.symbol.dtype == "category"
+    assert compact.timestamp.dtype == "int64"
+    assert compact.tickRule.dtype == "int8"
+    assert compact.nanoseconds.dtype == "int16"
+    columns = get_schema_columns(MULTIPLE_SYMBOL_SCHEMA)
+    pd.testing.assert_frame_equal(
+        set_schema_types(compact[columns], MULTIPLE_SYMBOL_SCHEMA),
+        expected[columns],
+    )
+
+
+def test_compact_transforms():
+    data_frame = utc_timestamp(get_data_frame())
+    expected = strip_nanoseconds(data_frame.copy())
+    expected = calculate_tick_rule(set_columns(expected))
+    compact = strip_nanoseconds(data_frame, profile=COMPACT)
+    compact = calculate_tick_rule(set_columns(compact), profile=COMPACT)
+    # Smaller integers, when parsed.
+    assert compact.nanoseconds.dtype == "int16"
+    assert compact.tickRule.dtype == "int8"
+    assert compact.nanoseconds.tolist() == expected.nanoseconds.tolist()
+    assert compact.tickRule.tolist() == expected.tickRule.tolist()
@@ -25,3 +25,27 @@ def get_trade(
     if symbol:
         data["symbol"] = symbol
     return data
+
+
+class FirestoreCache:
+    """Documents by collection, without Firestore."""
+
+    documents = {}
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def has_data(self, document):
+        data = self.get(document)
+        return bool(data and data.get("ok", False))
+
+    def get(self, document):
+        return self.documents.get(self.collection, {}).get(document)
+
+    def get_one(self):
+        documents = self.documents.get(self.collection, {})
+        if documents:
+            return documents[min(documents)]
+
+    def set(self, document, data):
+        self.documents.setdefault(self.collection, {})[document] = data